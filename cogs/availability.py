@@ -1,14 +1,17 @@
 import uuid
 import logging
+import discord
 from datetime import datetime, timedelta, timezone
 from discord.ext import commands, tasks
 from utils.json_io import save_json, load_json
+from utils.storage import get_backend
+from utils.overlaps import OverlapIndex, MIN_PLAYERS, migrate_times, archive, now_minutes, minutes_to_datetime
 
 CONFIG_FILE = "config.json"
-DATA_FILE = "data/availability.json"
 TIMEZONES_FILE = "data/timezones.json"
-OVERLAPS_FILE = "data/overlaps.json"
 SESSIONS_CHANNEL_ID = 1335991687243104328
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+ANNOUNCE_INTERVAL_SECONDS = 30  # New and changed overlaps are announced in one batch per tick
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]: %(message)s")
 
@@ -16,17 +19,122 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]: %(m
 class Availability(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.index = OverlapIndex()
+        entries = get_backend().load_availability()
+        overlaps = get_backend().load_overlaps()
+        # Older data stored times as "%Y-%m-%d %H:%M" strings; convert once to epoch minutes.
+        if migrate_times(entries):
+            get_backend().save_availability(entries)
+        if migrate_times(overlaps):
+            get_backend().save_overlaps(overlaps)
+        self.index.load(entries, overlaps)
+        self.pending = {}  # window key -> window whose message needs posting or updating
+        self.retired = []  # windows that disappeared but still have a posted message
+        self.queue_announcements(window for window in self.index.overlaps() if window.get("message_id") is None)
         self.check_availability.start()
+        self.announce_overlaps.start()
+
+    def queue_announcements(self, added=(), changed=(), removed=()):
+        """Queue windows whose message needs posting or updating on the next announcement tick."""
+        for window in list(added) + list(changed):
+            self.pending[window["key"]] = window
+        for window in removed:
+            self.pending.pop(window["key"], None)
+            if window.get("message_id") is not None:
+                self.retired.append(window)
+
+    async def update_overlaps(self, added=(), changed=(), removed=()):
+        """Queue the announcements for a change to the overlap windows and persist the current overlap set."""
+        self.queue_announcements(added, changed, removed)
+        get_backend().save_overlaps(self.index.overlaps())
+
+    @staticmethod
+    def window_embed(window) -> discord.Embed:
+        embed = discord.Embed(title="Overlap Found", color=0x00FF00,
+                              description=f"<t:{window['start'] * 60}:f> → <t:{window['end'] * 60}:f>")
+        embed.add_field(name=f"Players ({len(window['user_ids'])})",
+                        value=" ".join(f"<@{user_id}>" for user_id in window["user_ids"]), inline=False)
+        return embed
+
+    async def post_window(self, channel, window):
+        """
+        Edit the window's existing message in place, or post a new one if it has none (or it was deleted).
+
+        Discord doesn't notify users newly mentioned in an edit, so players who joined since the message was last
+        posted get a short reply mentioning just them. "announced_user_ids" keeps who the message has pinged.
+        """
+        mentions = " ".join(f"<@{user_id}>" for user_id in window["user_ids"])
+        embed = self.window_embed(window)
+        if window.get("message_id") is not None:
+            try:
+                message = channel.get_partial_message(window["message_id"])
+                await message.edit(content=mentions, embed=embed)
+                announced = window.get("announced_user_ids", [])
+                joined = [user_id for user_id in window["user_ids"] if user_id not in announced]
+                if joined:
+                    await channel.send(
+                        f"👋 {' '.join(f'<@{user_id}>' for user_id in joined)} joined the overlap "
+                        f"<t:{window['start'] * 60}:f> → <t:{window['end'] * 60}:f>.", reference=message)
+                window["announced_user_ids"] = sorted(set(announced) | set(joined), key=str)
+                return
+            except discord.NotFound:
+                pass
+        message = await channel.send(content=mentions, embed=embed)
+        window["message_id"] = message.id
+        window["announced_user_ids"] = list(window["user_ids"])
+
+    @tasks.loop(seconds=ANNOUNCE_INTERVAL_SECONDS)
+    async def announce_overlaps(self):
+        """
+        Send the queued window announcements as one batch: one message (or one edit) per window, however many
+        players or entries changed it. A window that grew, shrank or split takes over the message of the window it
+        replaced, and messages of windows that disappeared outright are deleted.
+        """
+        if not self.pending and not self.retired:
+            return
+        channel = self.bot.get_channel(SESSIONS_CHANNEL_ID)
+        if channel is None:
+            return  # Kept queued until the channel is available
+
+        now = now_minutes()
+        windows = [window for key, window in self.pending.items()
+                   if self.index.windows.get(key) is window and window["end"] > now]
+        retired, self.pending, self.retired = self.retired, {}, []
+        for window in windows:
+            if window.get("message_id") is not None:
+                continue
+            for old in retired:
+                if old["start"] < window["end"] and window["start"] < old["end"]:
+                    window["message_id"] = old["message_id"]
+                    window["announced_user_ids"] = old.get("announced_user_ids", [])
+                    retired.remove(old)
+                    break
+
+        for window in windows:
+            try:
+                await self.post_window(channel, window)
+            except discord.HTTPException as e:
+                print(f"[DEBUG] Unable to announce overlap {window['key']}: {e}")
+                self.pending[window["key"]] = window
+        for window in retired:
+            try:
+                await channel.get_partial_message(window["message_id"]).delete()
+            except discord.HTTPException as e:
+                print(f"[DEBUG] Unable to delete overlap message {window['message_id']}: {e}")
+        get_backend().save_overlaps(self.index.overlaps())
+
+    @announce_overlaps.before_loop
+    async def before_announce_overlaps(self):
+        await self.bot.wait_until_ready()
 
     @commands.group(name="availability", invoke_without_command=True)
     async def availability(self, ctx):
-        await ctx.send("Use `!availability add`, `!availability list`, or `!availability remove`.", delete_after=5)
+        await ctx.send("Use `!availability add`, `!availability weekly`, `!availability list`, `!availability remove`, "
+                       "or `!availability best`.", delete_after=5)
 
-    @availability.command(name="add")
-    async def availability_add(self, ctx, date: str, start: str, end: str):
-        """Add availability using local time (e.g., `!availability add 2025-02-20 1600 0400`)."""
+    async def get_offset(self, ctx):
+        """Return the caller's UTC offset, asking for it first if it isn't set. None if they didn't give one."""
         timezones = load_json(TIMEZONES_FILE)
-        data = load_json(DATA_FILE)
 
         user_id = str(ctx.author.id)
 
@@ -45,12 +153,20 @@ class Availability(commands.Cog):
                 await ctx.send(f"✅ Timezone set to UTC{offset:+d}. You can now add availability.", delete_after=5)
             except ValueError:
                 await ctx.send("❌ Invalid offset. Please enter a number (e.g., -5, 0, +3).", delete_after=5)
-                return
+                return None
             except TimeoutError:
                 await ctx.send("❌ You took too long. Try again.", delete_after=15)
-                return
+                return None
 
-        offset = timezones[user_id]
+        return timezones[user_id]
+
+    @availability.command(name="add")
+    async def availability_add(self, ctx, date: str, start: str, end: str):
+        """Add availability using local time (e.g., `!availability add 2025-02-20 1600 0400`)."""
+        offset = await self.get_offset(ctx)
+        if offset is None:
+            return
+        user_id = str(ctx.author.id)
         offset_delta = timedelta(hours=offset)
         tz_info = timezone(offset_delta)
 
@@ -79,19 +195,66 @@ class Availability(commands.Cog):
             "id": str(uuid.uuid4()),
             "discord_name": discord_name,
             "user_id": user_id,
-            "start": start_utc.strftime("%Y-%m-%d %H:%M"),
-            "end": end_utc.strftime("%Y-%m-%d %H:%M"),
+            "start": int(start_utc.timestamp() // 60),  # UTC epoch minutes
+            "end": int(end_utc.timestamp() // 60),
         }
 
-        data.setdefault("availability", []).append(availability_entry)
-        save_json(DATA_FILE, data)
+        get_backend().add_availability(availability_entry)
+        changes = self.index.add(availability_entry)
 
         await ctx.send(
             f"✅ Availability added for **{discord_name}**: {start_local.strftime('%Y-%m-%d %H:%M')} to {end_local.strftime('%Y-%m-%d %H:%M')} (Local Time)", delete_after=5)
+        await self.update_overlaps(*changes)
+
+    @availability.command(name="weekly")
+    async def availability_weekly(self, ctx, day: str, start: str, end: str):
+        """Add availability that repeats every week, in local time (e.g., `!availability weekly Fri 1600 0400`)."""
+        weekday = day.strip().lower()[:3]
+        if weekday not in WEEKDAYS:
+            await ctx.send("❌ Invalid day. Use a weekday like `Fri` or `Friday`.", delete_after=5)
+            return
+
+        offset = await self.get_offset(ctx)
+        if offset is None:
+            return
+        tz_info = timezone(timedelta(hours=offset))
+
+        try:
+            start_time = datetime.strptime(f"{start[:2]}:{start[2:]}", "%H:%M").time()
+            end_time = datetime.strptime(f"{end[:2]}:{end[2:]}", "%H:%M").time()
+        except ValueError:
+            await ctx.send("❌ Invalid time format. Use HHMM like `1600`.", delete_after=5)
+            return
+
+        # The rule is anchored on this week's occurrence; ones that have already ended are never expanded.
+        today = datetime.now(tz_info).date()
+        first_day = today + timedelta(days=(WEEKDAYS.index(weekday) - today.weekday()) % 7)
+        start_local = datetime.combine(first_day, start_time, tz_info)
+        end_local = datetime.combine(first_day, end_time, tz_info)
+        if end_local <= start_local:
+            end_local += timedelta(days=1)
+
+        discord_name = ctx.author.name.strip().lower().capitalize()
+        rule = {
+            "id": str(uuid.uuid4()),
+            "discord_name": discord_name,
+            "user_id": str(ctx.author.id),
+            "recurrence": "weekly",
+            "start": int(start_local.timestamp() // 60),  # First occurrence, UTC epoch minutes
+            "end": int(end_local.timestamp() // 60),
+        }
+
+        get_backend().add_availability(rule)
+        changes = self.index.add_rule(rule)
+
+        await ctx.send(
+            f"✅ Weekly availability added for **{discord_name}**: every {start_local.strftime('%A %H:%M')} to "
+            f"{end_local.strftime('%H:%M')} (Local Time)", delete_after=5)
+        await self.update_overlaps(*changes)
 
     @availability.command(name="list")
     async def availability_list(self, ctx):
-        data = load_json(DATA_FILE)
+        entries = self.index.entries.values()
         timezones = load_json(TIMEZONES_FILE)
         user_id = str(ctx.author.id)
 
@@ -103,72 +266,92 @@ class Availability(commands.Cog):
         offset_delta = timedelta(hours=offset)
         tz_info = timezone(offset_delta)
 
-        user_availabilities = [a for a in data.get("availability", []) if a["user_id"] == user_id]
+        user_availabilities = [a for a in entries if a["user_id"] == user_id and "rule_id" not in a]
+        user_rules = [r for r in self.index.rules.values() if r["user_id"] == user_id]
 
-        if not user_availabilities:
+        if not user_availabilities and not user_rules:
             await ctx.send("❌ You have no availability set.", delete_after=5)
             return
 
         response = f"**Your Availability (UTC{offset:+d}):**\n"
         for entry in user_availabilities:
-            start_utc = datetime.strptime(entry["start"], "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
-            end_utc = datetime.strptime(entry["end"], "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
-
-            start_local = start_utc.astimezone(tz_info).strftime("%Y-%m-%d %H:%M")
-            end_local = end_utc.astimezone(tz_info).strftime("%Y-%m-%d %H:%M")
+            start_local = minutes_to_datetime(entry["start"], tz_info).strftime("%Y-%m-%d %H:%M")
+            end_local = minutes_to_datetime(entry["end"], tz_info).strftime("%Y-%m-%d %H:%M")
 
             response += f"- `{entry['id']}`: {start_local} → {end_local}\n"
+        for rule in user_rules:
+            start_local = minutes_to_datetime(rule["start"], tz_info).strftime("%A %H:%M")
+            end_local = minutes_to_datetime(rule["end"], tz_info).strftime("%H:%M")
+
+            response += f"- `{rule['id']}`: every {start_local} → {end_local} (weekly)\n"
 
         await ctx.send(response, delete_after=30)
 
     @availability.command(name="remove")
     async def availability_remove(self, ctx, availability_id: str):
-        data = load_json(DATA_FILE)
         user_id = str(ctx.author.id)
-
-        initial_count = len(data.get("availability", []))
-        data["availability"] = [
-            a for a in data["availability"] if not (a["id"] == availability_id and a["user_id"] == user_id)
-        ]
-
-        if len(data["availability"]) < initial_count:
-            save_json(DATA_FILE, data)
+        rule = self.index.rules.get(availability_id)
+        entry = rule or self.index.entries.get(availability_id)
+
+        if entry is not None and entry["user_id"] == user_id and "rule_id" not in entry:
+            get_backend().remove_availability(availability_id)
+            if rule is not None:
+                changes = self.index.remove_rule(availability_id)
+            else:
+                changes = self.index.remove(availability_id)
             await ctx.send(f"✅ Removed availability with ID `{availability_id}`.", delete_after=5)
+            await self.update_overlaps(*changes)
         else:
             await ctx.send(f"❌ Availability with ID `{availability_id}` not found.", delete_after=5)
 
-    @tasks.loop(minutes=5)
-    async def check_availability(self):
-        data = load_json(DATA_FILE)
-        overlaps = load_json(OVERLAPS_FILE)
-        now = datetime.utcnow()
-        channel = self.bot.get_channel(SESSIONS_CHANNEL_ID)
-
-        updated_overlaps = []
-
-        for i, a1 in enumerate(data.get("availability", [])):
-            for j, a2 in enumerate(data.get("availability", [])):
-                if i >= j or a1["user_id"] == a2["user_id"]:
-                    continue
-
-                overlap_start = max(a1["start"], a2["start"])
-                overlap_end = min(a1["end"], a2["end"])
+    @availability.command(name="best")
+    async def availability_best(self, ctx, min_players: int = MIN_PLAYERS, min_hours: float = 0):
+        """
+        Show the best upcoming session times (e.g., `!availability best 3 2`).
+        Windows are ranked by how many players are free, then by length, and shown in your local time.
+        """
+        timezones = load_json(TIMEZONES_FILE)
+        offset = timezones.get(str(ctx.author.id), 0)
+        tz_info = timezone(timedelta(hours=offset))
 
-                if overlap_start < overlap_end:
-                    overlap_key = f"{overlap_start}_{overlap_end}"
-                    existing = next((o for o in overlaps.get("overlaps", []) if o["key"] == overlap_key), None)
+        windows = self.index.best_windows(min_players, int(min_hours * 60))
+        if not windows:
+            await ctx.send(f"❌ No upcoming window with at least {min_players} players"
+                           f"{f' for {min_hours:g} hours' if min_hours else ''}.", delete_after=15)
+            return
 
-                    if not existing:
-                        msg = await channel.send(
-                            f"**Overlap Found:** {overlap_start} → {overlap_end}\n"
-                            f"Players: <@{a1['user_id']}> <@{a2['user_id']}>"
-                        )
-                        updated_overlaps.append({"key": overlap_key, "start": overlap_start, "end": overlap_end, "message_id": msg.id})
-                    else:
-                        updated_overlaps.append(existing)
+        response = f"**Best session times (UTC{offset:+d}):**\n"
+        for rank, (start, end, players) in enumerate(windows, start=1):
+            start_local = minutes_to_datetime(start, tz_info).strftime("%a %Y-%m-%d %H:%M")
+            end_local = minutes_to_datetime(end, tz_info).strftime("%a %Y-%m-%d %H:%M")
+            hours, minutes = divmod(end - start, 60)
+            names = ", ".join(sorted(self.player_name(user_id) for user_id in players))
+            response += f"{rank}. {start_local} → {end_local} ({hours}h {minutes}m) — {len(players)} players: {names}\n"
+        if str(ctx.author.id) not in timezones:
+            response += "_Times are in UTC; use `!availability add` to set your timezone._"
+        await ctx.send(response, delete_after=60)
+
+    def player_name(self, user_id) -> str:
+        """Display name for a player, taken from their availability entries."""
+        entry = next((e for e in self.index.entries.values() if e["user_id"] == user_id), None)
+        return entry["discord_name"] if entry else str(user_id)
 
-        overlaps["overlaps"] = updated_overlaps
-        save_json(OVERLAPS_FILE, overlaps)
+    @tasks.loop(minutes=5)
+    async def check_availability(self):
+        """
+        Housekeeping only: overlaps are maintained as availability is added or removed.
+        Archives entries and windows that have ended and expands weekly rules into the new part of the look-ahead
+        horizon. Weekly rules themselves are never archived.
+        """
+        now = now_minutes()
+        ended_entries, ended_windows = self.index.expire(now)
+        if ended_entries:
+            archive("availability", ended_entries)
+            get_backend().remove_availability_entries([entry["id"] for entry in ended_entries])
+        archive("overlap", ended_windows)
+        added, changed, removed = self.index.extend(now)
+        if ended_windows or added or changed or removed:
+            await self.update_overlaps(added, changed, removed)
 
     @check_availability.before_loop
     async def before_check_availability(self):
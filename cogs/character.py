@@ -2,6 +2,8 @@ from discord.ext import commands
 from discord import Embed
 import json
 from utils.inventory import load_inventory, save_inventory, modify_item
+from utils.storage import get_backend
+from utils.market import market
 
 
 class CharacterCog(commands.Cog):
@@ -146,9 +148,13 @@ class CharacterCog(commands.Cog):
         print(f"[DEBUG] Found {actual_item} in items with quantity {current_amount}")
 
         item_value = self.get_item_value(actual_item)
+        if item_value is None:
+            item_value = market.price(actual_item)
+            if item_value is not None:
+                print(f"[DEBUG] Value not found for '{actual_item}' in values.json. Using market price {item_value}")
         if item_value is None:
             item_value = 0.001
-            print(f"[DEBUG] Value not found for '{actual_item}' in values.json. Defaulting to {item_value}")
+            print(f"[DEBUG] Value not found for '{actual_item}' in values.json or the market. Defaulting to {item_value}")
 
         total_value = item_value * amount
         print(f"[DEBUG] Item Value: {item_value}, Total Value: {total_value}")
@@ -156,24 +162,8 @@ class CharacterCog(commands.Cog):
         modify_item(character, "items", actual_item, -amount)
         save_inventory(character_name, character)
 
-        # Update donations.json
-        try:
-            with open("data/donations.json", "r") as f:
-                donations = json.load(f)
-        except FileNotFoundError:
-            donations = {}
-
-        if character_name not in donations:
-            donations[character_name] = {"items": {}, "total_value": 0}
-
-        if actual_item not in donations[character_name]["items"]:
-            donations[character_name]["items"][actual_item] = 0
-
-        donations[character_name]["items"][actual_item] += amount
-        donations[character_name]["total_value"] += total_value
-
-        with open("data/donations.json", "w") as f:
-            json.dump(donations, f, indent=4)
+        # Record the donation
+        get_backend().add_donation(character_name, actual_item, amount, total_value)
 
         print(f"[DEBUG] Donation complete: {amount} {actual_item}(s) worth {total_value} points.")
         await ctx.send(f"{character_name} donated {amount} {actual_item}(s) worth {total_value:.3f} points.", delete_after=5)
@@ -19,23 +19,32 @@ class CommandsCog(commands.Cog):
         command_list = (
             "**!Available Commands:**\n"
             "🔹 **!scavenge <Character Name> [Resource Type]** - Scavenge for raw materials once per hour.\n"
-            "🔹 **!craft <Character Name> <Item Name>** - Craft an item if you have the required materials.\n"
+            "🔹 **!craft <Character Name> <Item Name> [xN]** - Craft an item (or N batches) if you have the required materials.\n"
+            "🔹 **!craft_queue <Character Name>** - Show what your character is crafting and what is queued.\n"
+            "🔹 **!craftable <Character Name>** - List every recipe your character can craft right now.\n"
+            "🔹 **!plan <Item Name> [Quantity] [for <Character Name>]** - Show every raw material and craft needed.\n"
             "🔹 **!disassemble <Character Name> <Item Name>** - Break down an item into materials.\n"
             "🔹 **!trade proposal <Character Name> <Offer Item> <Amount> <Request Item> <Amount>** - Propose a trade.\n"
+            "🔹 **!trade auto <Character Name> <Offer Item> <Amount> <Request Item> <Amount>** - Propose a trade and match it automatically.\n"
             "🔹 **!trade accept <Character Name> <Trade ID>** - Accept a trade proposal.\n"
-            "🔹 **!trade list** - View all open trade proposals.\n"
+            "🔹 **!trade cancel <Trade ID>** - Withdraw one of your own trade proposals.\n"
+            "🔹 **!trade list [Item Name]** - View all open trade proposals, or only those involving an item.\n"
+            "🔹 **!market <Item Name>** - Show recent trade prices and volume for an item.\n"
             "🔹 **!session <Session ID> <Character Name> <XP Earned> <Gold Earned> <Expenses>** - Log session results.\n"
             "🔹 **!stats** - View a summary of XP and gold for your characters.\n"
             "🔹 **!inventory <Character Name>** - Receive your character's inventory in a DM.\n"
             "🔹 **!availability add <Date> <Start Time> <End Time>** - Add your availability.\n"
+            "🔹 **!availability weekly <Day> <Start Time> <End Time>** - Add availability that repeats every week.\n"
             "🔹 **!availability list** - View your availability.\n"
             "🔹 **!availability remove <Availability ID>** - Remove an availability entry.\n"
+            "🔹 **!availability best [Min Players] [Min Hours]** - Find the best upcoming session times.\n"
             "🔹 **!rp <Character Name> <Message>** - Send a roleplay message as your character.\n"
             "🔹 **!emote <Character Name> <Message>** - Send a non-spoken emote message as your character.\n"
             "🔹 **!setavatar <Character Name>** - Upload an image to set as your character's avatar.\n"
             "🔹 **!list_projects** - List all active group projects.\n"
             "🔹 **!contribute <Character Name> <Project ID> <Resource> <Amount>** - Contribute materials to a project.\n"
             "🔹 **!check_project <Project ID>** - View progress of a specific project.\n"
+            "🔹 **!project_leaderboard <Project ID>** - See who has contributed the most to a project.\n"
             "🔹 **!work_on_project <Character Name> <Project ID> <Hours>** - Work on a project using labor.\n"
             "🔹 **!life <Character Name>** - Create a new character.\n"
             "🔹 **!death <Character Name>** - Delete a character (requires confirmation).\n"
@@ -83,9 +92,11 @@ class CommandsCog(commands.Cog):
 
         await ctx.send(
             "**Craft Command Help**\n"
-            "Usage: `!craft <Character Name> <Item Name>`\n"
+            "Usage: `!craft <Character Name> <Item Name> [xN]`\n"
             "Description: Allows your character to craft an item if the necessary materials are available.\n"
-            "Example: `!craft Taco Wooden Mallet`\n"
+            "Add `xN` to craft N batches; components for all of them are reserved up front. Crafting while already "
+            "crafting adds the item to your queue, which continues on its own.\n"
+            "Example: `!craft Taco Wooden Mallet` or `!craft Taco Cordage x20`\n"
             "Copy-paste: `!craft <YourCharacterName> <ItemName>`\n", delete_after=150
         )
 
@@ -105,14 +116,26 @@ class CommandsCog(commands.Cog):
             "Example: `!trade proposal Taco Mulberry Log 2 Gold 5`\n"
             "Copy-paste: `!trade proposal <YourCharacterName> <OfferItem> <Amount> <RequestItem> <Amount>`\n"
             "\n"
+            "**Automatic Matching**\n"
+            "Usage: `!trade auto <Character Name> <Offer Item> <Amount> <Request Item> <Amount>`\n"
+            "Open proposals offering what you want at your rate or better are settled immediately; the rest is posted.\n"
+            "Example: `!trade auto Taco Gold 1 Mulberry Log 2`\n"
+            "\n"
             "**Trade Accept Command**\n"
             "Usage: `!trade accept <Character Name> <Trade ID>`\n"
             "Accept a trade proposal.\n"
             "Example: `!trade accept Taco 12345-abcde`\n"
             "Copy-paste: `!trade accept YourCharacterName TradeID`\n"
             "\n"
+            "**Cancel a Trade Proposal**\n"
+            "Usage: `!trade cancel <Trade ID>`\n"
+            "Withdraw a trade proposal you made.\n"
+            "Copy-paste: `!trade cancel TradeID`\n"
+            "\n"
             "**View Standing Trade Proposals**\n"
-            "Usage: `!trade list`\n"
+            "Usage: `!trade list [Item Name]`\n"
+            "Add an item name to only see trades offering or requesting it.\n"
+            "Example: `!trade list Mulberry Log`\n"
             "Copy-paste: `!trade list`\n", delete_after=150
         )
 
@@ -130,7 +153,13 @@ class CommandsCog(commands.Cog):
             "Usage: `!availability add <Date> <Start Time> <End Time>`\n"
             "Description: Allows you to set when you're available for game sessions.\n"
             "Example: `!availability add 2025-02-10 18:00 22:00`\n"
-            "Copy-paste: `!availability add <YYYY-MM-DD> <HH:MM> <HH:MM>`\n", delete_after=150
+            "Copy-paste: `!availability add <YYYY-MM-DD> <HH:MM> <HH:MM>`\n"
+            "Usage: `!availability weekly <Day> <Start Time> <End Time>`\n"
+            "Description: Sets a slot that repeats every week, e.g. every Friday evening.\n"
+            "Example: `!availability weekly Fri 1600 0400`\n"
+            "Usage: `!availability best [Min Players] [Min Hours]`\n"
+            "Description: Lists the upcoming windows where the most players are free, longest first, in your timezone.\n"
+            "Example: `!availability best 3 2`\n", delete_after=150
         )
 
     @commands.command(name="disassemble")
@@ -1,11 +1,13 @@
-import os
-import asyncio
-from discord.ext import commands, tasks
-from utils.inventory import load_inventory, save_inventory
-from utils.json_io import load_recipes, load_scavenge_table
-from utils.functions import find_wildcard_match, normalize_components
+import time
+from discord.ext import commands
+from utils.inventory import load_inventory, save_inventory, normalize_character_name
+from utils.json_io import load_scavenge_table
+from utils.functions import find_wildcard_match, job_deadline, reserve_components
+from utils.recipes import catalog
+from utils.planner import planner, RecipeCycleError
+from utils.scheduler import scheduler
 
-INVENTORY_DIR = "data/inventories/"  # Directory for storing character inventories
+MAX_CRAFT_QUEUE = 50  # Batches a character may have waiting behind the active craft
 
 
 class Crafting(commands.Cog):
@@ -13,59 +15,59 @@ class Crafting(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.recipes = load_recipes()
         self.scavenge_table = load_scavenge_table()
-        self.check_crafting_completion.start()  # Start background task
+        scheduler.register("crafting", self.complete_crafting, lambda inventory: job_deadline(inventory, "crafting"))
 
     @commands.command(name="craft")
     async def craft(self, ctx, character_name: str, *, item_name: str):
-        """Start crafting an item."""
+        """
+        Start crafting an item, or queue it behind the current craft.
+
+        Usage: !craft <character> <item> [xN]
+        Components for all N batches are reserved at once. Queued batches start automatically as each one finishes.
+        """
+        batches = 1
+        parts = item_name.rsplit(" ", 1)
+        if len(parts) == 2 and parts[1][:1].lower() == "x" and parts[1][1:].isdigit():
+            item_name, batches = parts[0], int(parts[1][1:])
         item_name = item_name.title()
         inventory = load_inventory(character_name)
-        recipes = load_recipes()
 
         # Delete the triggering message
         await ctx.message.delete(delay=0)
 
+        if batches < 1:
+            await ctx.send("❌ The number of batches must be at least 1.", delete_after=5)
+            return
+
         # Ensure expected keys exist
         inventory.setdefault("items", {})
         inventory.setdefault("active_crafting", None)
         inventory.setdefault("active_disassembling", None)
         inventory.setdefault("active_scavenge", None)
+        queue = inventory.setdefault("crafting_queue", [])
 
-        # Look for the recipe in all recipe categories
-        recipe = None
-        for category, items in recipes.items():
-            if item_name in items:
-                recipe = items[item_name]
-                break
+        recipe = catalog.get(item_name)
         if recipe is None:
             await ctx.send(f"❌ `{item_name}` is not craftable.", delete_after=5)
             return
 
-        if inventory.get("active_crafting"):
-            await ctx.send(
-                f"⏳ `{character_name}` is already crafting `{inventory['active_crafting']['item']}`.", delete_after=5)
-            return
-
         if any(inventory.get(task) for task in ["active_scavenge", "active_disassembling", "active_labor"]):
             await ctx.send(f"❌ {character_name} is already busy with another task.", delete_after=15)
             return
 
-        # Normalize components in case they're defined as a list (as in Wood Planks)
-        required_components = normalize_components(recipe["components"])
+        queued = sum(entry["batches"] for entry in queue)
+        if queued + batches > MAX_CRAFT_QUEUE + (0 if inventory["active_crafting"] else 1):
+            await ctx.send(
+                f"⚠️ `{character_name}` can only have {MAX_CRAFT_QUEUE} batches queued ({queued} already waiting).",
+                delete_after=10)
+            return
+
+        item_name = recipe["name"]
         crafting_time = recipe.get("time", 30)  # Default crafting time in minutes
 
-        # Process required tools from the recipe.
-        tools_field = recipe.get("requires", "")
-        if isinstance(tools_field, str):
-            required_tools_raw = [tool.strip() for tool in tools_field.split(",") if tool.strip()]
-        elif isinstance(tools_field, list):
-            required_tools_raw = tools_field
-        else:
-            required_tools_raw = []
         # Use wildcard matching for each tool requirement.
-        required_tools = [find_wildcard_match(inventory, tool) for tool in required_tools_raw]
+        required_tools = [find_wildcard_match(inventory, tool) for tool in recipe["requires"]]
 
         outputs = recipe.get("outputs", [])
 
@@ -76,50 +78,184 @@ class Crafting(commands.Cog):
                 delete_after=5)
             return
 
-        # Check and deduct required components (using wildcard matching if applicable).
-        for component, amount in required_components.items():
-            matched_component = find_wildcard_match(inventory, component)
-            if inventory["items"].get(matched_component, 0) < amount:
-                await ctx.send(
-                    f"⚠️ `{character_name}` does not have enough `{component}` to craft `{item_name}`.",
-                    delete_after=5)
-                return
-
-        for component, amount in required_components.items():
-            matched_component = find_wildcard_match(inventory, component)
-            inventory["items"][matched_component] -= amount
-
-        # Record the active crafting project along with its outputs.
-        inventory["active_crafting"] = {
-            "item": item_name,
-            "outputs": outputs,
-            "completion_time": asyncio.get_event_loop().time() + crafting_time * 60
-        }
+        # Reserve the components for every batch at once (using wildcard matching if applicable).
+        missing = reserve_components(inventory, recipe, batches)
+        if missing:
+            await ctx.send(
+                f"⚠️ `{character_name}` does not have enough `{missing}` to craft {batches} × `{item_name}`.",
+                delete_after=5)
+            return
+
+        waiting = batches
+        if not inventory["active_crafting"]:
+            # Record the active crafting project along with its outputs.
+            inventory["active_crafting"] = {
+                "item": item_name,
+                "outputs": outputs,
+                "completion_time": time.time() + crafting_time * 60  # UTC epoch seconds
+            }
+            waiting -= 1
+            scheduler.schedule("crafting", normalize_character_name(character_name),
+                               inventory["active_crafting"]["completion_time"])
+        if waiting:
+            if queue and queue[-1]["item"] == item_name:
+                queue[-1]["batches"] += waiting
+            else:
+                queue.append({"item": item_name, "outputs": outputs, "time": crafting_time, "batches": waiting})
         save_inventory(character_name, inventory)
 
-        await ctx.send(
-            f"🛠️ `{character_name}` has started crafting `{item_name}`. This will take {crafting_time} minutes.",
-            delete_after=10)
+        if waiting == batches:
+            await ctx.send(
+                f"📋 `{character_name}` queued {batches} × `{item_name}` behind "
+                f"`{inventory['active_crafting']['item']}`.", delete_after=10)
+        else:
+            await ctx.send(
+                f"🛠️ `{character_name}` has started crafting {batches} × `{item_name}`. "
+                f"This will take {crafting_time * batches} minutes.", delete_after=10)
 
-    @tasks.loop(minutes=7)
-    async def check_crafting_completion(self):
-        """Check and complete crafting projects."""
-        current_time = asyncio.get_event_loop().time()
+    @commands.command(name="craft_queue")
+    async def craft_queue(self, ctx, *, character_name: str):
+        """Show the character's current craft and everything queued behind it, with finish times."""
+        await ctx.message.delete(delay=0)
+        inventory = load_inventory(character_name)
+        active = inventory.get("active_crafting")
+        if not active:
+            await ctx.send(f"📭 `{character_name}` is not crafting anything.", delete_after=15)
+            return
+
+        finish = job_deadline(inventory, "crafting")
+        lines = [f"🛠️ **{character_name}'s crafting queue:**",
+                 f"1. {active['item']} — done <t:{int(finish)}:R>"]
+        for position, entry in enumerate(inventory.get("crafting_queue", []), start=2):
+            finish += entry["time"] * 60 * entry["batches"]
+            lines.append(f"{position}. {entry['item']} × {entry['batches']} — done <t:{int(finish)}:R>")
+        await ctx.send("\n".join(lines), delete_after=60)
+
+    @commands.command(name="plan")
+    async def plan(self, ctx, *, args: str):
+        """
+        Show the full bill of materials for crafting an item.
+
+        Usage: !plan <item> [qty] [for <character>]
+        Lists total raw components, tools, crafting time and the intermediate crafts in order.
+        With "for <character>", also lists what that character is missing.
+        """
+        await ctx.message.delete(delay=0)
+        tokens = args.split()
+        character_name = None
+        if "for" in tokens[:-1]:
+            split_at = len(tokens) - 1 - tokens[::-1].index("for")
+            character_name = " ".join(tokens[split_at + 1:])
+            tokens = tokens[:split_at]
+        qty = 1
+        if len(tokens) > 1 and tokens[-1].isdigit():
+            qty = int(tokens.pop())
+        item_name = " ".join(tokens)
+        if qty < 1:
+            await ctx.send("❌ The quantity must be at least 1.", delete_after=5)
+            return
 
-        for filename in os.listdir(INVENTORY_DIR):
-            if not filename.endswith('.json'):
-                continue
-            character_name = filename[:-5]
+        recipe = catalog.get(item_name)
+        if recipe is None:
+            await ctx.send(f"❌ `{item_name}` is not craftable.", delete_after=5)
+            return
+        try:
+            plan = planner.plan(recipe["name"], qty)
+        except RecipeCycleError as e:
+            await ctx.send(f"⚠️ {e}", delete_after=15)
+            return
+
+        hours, minutes = divmod(plan["time"], 60)
+        lines = [f"📐 **Plan for {qty} {recipe['name']}** (total crafting time: {int(hours)}h {int(minutes)}m)",
+                 "**Raw components:**"]
+        lines += [f"- {name}: {count}" for name, count in plan["raw"].items()]
+        if plan["tools"]:
+            lines.append(f"**Tools:** {', '.join(plan['tools'])}")
+        lines.append("**Crafts (in order):**")
+        lines += [f"{i}. {name} × {batches}" for i, (name, batches) in enumerate(plan["crafts"], start=1)]
+        if plan["byproducts"]:
+            lines.append("**Left over:** " + ", ".join(f"{count} {name}" for name, count in plan["byproducts"].items()))
+        if not recipe["outputs"]:
+            lines.append(f"⚠️ `{recipe['name']}` has no outputs: crafting it doesn't add any item to the inventory.")
+
+        if character_name:
             inventory = load_inventory(character_name)
+            missing = planner.missing(plan, inventory)
+            if missing:
+                lines.append(f"**{character_name} is missing:**")
+                lines += [f"- {name}: {count}" for name, count in missing.items()]
+            else:
+                lines.append(f"✅ {character_name} has everything needed.")
 
-            if inventory.get("active_crafting") and inventory["active_crafting"]["completion_time"] <= current_time:
-                outputs = inventory["active_crafting"].get("outputs", [])
-                for output in outputs:
-                    output_item = output["item"]
-                    output_quantity = output["quantity"]
-                    inventory["items"][output_item] = inventory["items"].get(output_item, 0) + output_quantity
+        await ctx.send("\n".join(lines), delete_after=60)
+
+    @commands.command(name="craftable")
+    async def craftable(self, ctx, *, character_name: str):
+        """List every recipe the character can start right now and how many batches they can afford."""
+        await ctx.message.delete(delay=0)
+        inventory = load_inventory(character_name)
+        if any(inventory.get(task) for task in ["active_scavenge", "active_disassembling", "active_labor"]):
+            await ctx.send(f"❌ {character_name} is already busy with another task.", delete_after=15)
+            return
 
-                inventory["active_crafting"] = None
+        # !craft accepts at most this many more batches.
+        queued = sum(entry["batches"] for entry in inventory.get("crafting_queue", []))
+        room = MAX_CRAFT_QUEUE + (0 if inventory.get("active_crafting") else 1) - queued
+        if room <= 0:
+            await ctx.send(f"⚠️ `{character_name}` already has {MAX_CRAFT_QUEUE} batches queued.", delete_after=10)
+            return
+
+        results = planner.craftable(inventory, room)
+        if not results:
+            await ctx.send(f"📭 `{character_name}` can't craft anything with their current items.", delete_after=15)
+            return
+
+        lines = [f"🛠️ **{character_name} can craft:**"]
+        lines += [f"- {recipe['name']} (up to {batches} batch{'es' if batches != 1 else ''})"
+                  for recipe, batches in results]
+        await ctx.send("\n".join(lines), delete_after=60)
+
+    @staticmethod
+    def _next_batch(queue, start_time):
+        """Take one batch off the front of the queue and return it as an active craft starting at start_time."""
+        if not queue:
+            return None
+        entry = queue[0]
+        entry["batches"] -= 1
+        if entry["batches"] <= 0:
+            queue.pop(0)
+        return {
+            "item": entry["item"],
+            "outputs": entry["outputs"],
+            "completion_time": start_time + entry["time"] * 60  # UTC epoch seconds
+        }
+
+    async def complete_crafting(self, character_names):
+        """
+        Deliver the outputs of crafting jobs the scheduler reports as due and start the next queued batch.
+
+        Each queued batch starts when the previous one was due, so batches that finished while the bot was down
+        are all delivered in this pass. Every delivered batch is saved before the next one is looked at, so a failure
+        part-way never leaves a character with delivered items that aren't marked for saving.
+        """
+        current_time = time.time()
+
+        for character_name in character_names:
+            inventory = load_inventory(character_name)
+            queue = inventory.setdefault("crafting_queue", [])
+            while inventory.get("active_crafting"):
+                deadline = job_deadline(inventory, "crafting")
+                if deadline > current_time:
+                    scheduler.schedule("crafting", character_name, deadline)
+                    break
+
+                # Read the whole batch first so a malformed output can't leave it half delivered.
+                outputs = [(output["item"], output["quantity"])
+                           for output in inventory["active_crafting"].get("outputs", [])]
+                next_batch = self._next_batch(queue, deadline or current_time)
+                for output_item, output_quantity in outputs:
+                    inventory["items"][output_item] = inventory["items"].get(output_item, 0) + output_quantity
+                inventory["active_crafting"] = next_batch
                 save_inventory(character_name, inventory)
 
 
@@ -1,13 +1,12 @@
-import os
-import asyncio
-from discord.ext import commands, tasks
-from utils.json_io import save_json, load_json
-from utils.inventory import get_inventory_file
-from utils.functions import normalize_components
+import time
+from discord.ext import commands
+from utils.json_io import load_json
+from utils.inventory import load_inventory, save_inventory, normalize_character_name
+from utils.functions import job_deadline
+from utils.recipes import catalog
+from utils.scheduler import scheduler
 
 # File paths
-INVENTORY_DIR = "data/inventories/"  # Directory for storing character inventories
-RECIPES_FILE = "data/recipes.json"  # Recipes file
 SCAVENGE_FILE = "data/scavenge.json"  # Scavenge loot table (loaded for completeness)
 BROKEN_FILE = "data/broken.json"  # Broken component replacements (not used in this version)
 
@@ -17,9 +16,9 @@ class Disassembling(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.recipes = load_json(RECIPES_FILE)
         self.scavenge_table = load_json(SCAVENGE_FILE)
-        self.check_disassembling_completion.start()
+        scheduler.register("disassembling", self.complete_disassembling,
+                           lambda inventory: job_deadline(inventory, "disassembling"))
 
     @commands.command(name="disassemble")
     async def disassemble(self, ctx, character_name: str, *, item_name: str):
@@ -34,9 +33,7 @@ class Disassembling(commands.Cog):
           in the character's inventory under active_disassembling.
         """
         item_name = item_name.title()
-        inv_file = get_inventory_file(character_name)
-        inventory = load_json(inv_file)
-        recipes = self.recipes
+        inventory = load_inventory(character_name)
 
         # Delete the command message
         await ctx.message.delete(delay=0)
@@ -45,15 +42,11 @@ class Disassembling(commands.Cog):
         inventory.setdefault("items", {})
         inventory.setdefault("active_disassembling", None)
 
-        # Find the recipe for the given item (searching each category)
-        recipe = None
-        for category, items in recipes.items():
-            if item_name in items:
-                recipe = items[item_name]
-                break
+        recipe = catalog.get(item_name)
         if recipe is None:
             await ctx.send(f"❌ `{item_name}` cannot be disassembled.", delete_after=5)
             return
+        item_name = recipe["name"]
 
         # Check if disassembly is allowed for this item
         if recipe.get("disassemble", 1) == 0:
@@ -91,36 +84,36 @@ class Disassembling(commands.Cog):
             if inventory["items"][out_item] <= 0:
                 del inventory["items"][out_item]
 
-        # Normalize the components from the recipe (the items to be returned upon disassembly)
-        normalized_components = normalize_components(recipe.get("components", {}))
+        # The components to be returned upon disassembly (normalized to a dict by the catalog)
+        normalized_components = dict(recipe["components"])
 
         # Save the active disassembly process
         inventory["active_disassembling"] = {
             "item": item_name,
             "components": normalized_components,
-            "completion_time": asyncio.get_event_loop().time() + disassembling_time * 60,
+            "completion_time": time.time() + disassembling_time * 60,  # UTC epoch seconds
         }
-        save_json(inv_file, inventory)
+        save_inventory(character_name, inventory)
+        scheduler.schedule("disassembling", normalize_character_name(character_name),
+                           inventory["active_disassembling"]["completion_time"])
 
         await ctx.send(
             f"🔧 `{character_name}` has started disassembling `{item_name}`. It will take {disassembling_time} minutes.",
             delete_after=10)
 
-    @tasks.loop(minutes=6)
-    async def check_disassembling_completion(self):
+    async def complete_disassembling(self, character_names):
         """
-        Checks every minute for any active disassembly processes that have completed.
+        Called by the scheduler with the characters whose disassembly is due.
         When complete, the stored components are added to the character's inventory and the active process is cleared.
         """
-        current_time = asyncio.get_event_loop().time()
-        for filename in os.listdir(INVENTORY_DIR):
-            if not filename.endswith(".json"):
-                continue
-            character_name = filename[:-5]  # Remove the .json extension
-            inv_file = get_inventory_file(character_name)
-            inventory = load_json(inv_file)
+        current_time = time.time()
+        for character_name in character_names:
+            inventory = load_inventory(character_name)
             active = inventory.get("active_disassembling")
-            if active and active.get("completion_time", 0) <= current_time:
+            deadline = job_deadline(inventory, "disassembling")
+            if active and deadline > current_time:
+                scheduler.schedule("disassembling", character_name, deadline)
+            elif active:
                 normalized_components = active.get("components", {})
                 # Add each component (with its quantity) back into the items section
                 for comp_name, comp_qty in normalized_components.items():
@@ -129,7 +122,7 @@ class Disassembling(commands.Cog):
                 completed_item = active.get("item", "Unknown")
                 # Clear the active disassembly process
                 inventory["active_disassembling"] = None
-                save_json(inv_file, inventory)
+                save_inventory(character_name, inventory)
 
                 # Notify completion (using print here; replace with a channel message if needed)
                 print(f"✅ {character_name} has finished disassembling {completed_item} and received components.")
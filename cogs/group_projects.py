@@ -1,29 +1,40 @@
-from datetime import datetime, timedelta
-from discord.ext import commands, tasks
-from utils.json_io import load_json, save_json
+import time
+from discord.ext import commands
+from utils.json_io import load_json
+from utils.inventory import load_inventory, save_inventory, normalize_character_name
+from utils.storage import get_backend
+from utils.scheduler import scheduler
+from utils.contributions import ledger, project_progress, percent_complete
 from utils.functions import (
     get_next_project_id,
     check_phase_completion,
     check_labor_completion,
+    advance_project,
+    job_deadline,
     find_wildcard_match
 )
 
-ACTIVE_PROJECTS_FILE = "data/active_projects.json"
 PROJECTS_FILE = "data/projects.json"
-INVENTORY_DIR = "data/inventories/"
 MAX_HOURS_PER_WORK = 10  # Adjustable limit per !work_on_project
+LEADERBOARD_SIZE = 10  # Contributors shown by !project_leaderboard
 
 
 class GroupProjects(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.check_labor_completion.start()
+        scheduler.register("labor", self.complete_labor, lambda inventory: job_deadline(inventory, "labor"))
+        # Older projects kept every contribution in a "contributors" list; move them to the ledger once.
+        projects = get_backend().load_projects()
+        migrated = [project for project in projects.values() if ledger.migrate(project)]
+        if migrated:
+            get_backend().upsert_projects(migrated)
+            print(f"[DEBUG] Moved contributions of {len(migrated)} project(s) to the contribution ledger.")
 
     @commands.command(name="start_project")
     async def start_project(self, ctx, project_type: str):
         """Start a new project."""
         project_type = project_type.lower()
-        projects = load_json(ACTIVE_PROJECTS_FILE)
+        projects = get_backend().load_projects()
         project_definitions = load_json(PROJECTS_FILE).get("project_types", {})
 
         if project_type not in project_definitions:
@@ -46,17 +57,18 @@ class GroupProjects(commands.Cog):
             "status": "active",
             "created_by": str(ctx.author.id),
             "reward": project_def.get("reward", "None"),
-            "contributors": {}
+            "contributor_totals": {},
+            "contributor_credit": {}
         }
+        project["progress"] = project_progress(project)
 
-        projects[str(project_id)] = project
-        save_json(ACTIVE_PROJECTS_FILE, projects)
+        get_backend().upsert_project(project)
         await ctx.send(f"✅ Project **{project['name']}** (ID: {project_id}) has been started!", delete_after=5)
 
     @commands.command(name="list_projects")
     async def list_projects(self, ctx):
         """List all active projects."""
-        projects = load_json(ACTIVE_PROJECTS_FILE)
+        projects = get_backend().load_projects()
         active_projects = [p for p in projects.values() if p["status"] == "active"]
 
         if not active_projects:
@@ -65,21 +77,23 @@ class GroupProjects(commands.Cog):
 
         response = "**🛠️ Active Projects:**\n"
         for project in active_projects:
-            response += f"- **{project['name']}** (ID: `{project['id']}`), Phase: **{project['phases'][project['current_phase_index']]['phase']}**\n"
+            response += (f"- **{project['name']}** (ID: `{project['id']}`), Phase: "
+                         f"**{project['phases'][project['current_phase_index']]['phase']}**, "
+                         f"{percent_complete(project):.0f}% complete\n")
 
         await ctx.send(response, delete_after=15)
 
     @commands.command(name="contribute")
     async def contribute(self, ctx, character_name: str, project_id: int, resource: str, amount: int):
         """Contribute resources to a project."""
-        projects = load_json(ACTIVE_PROJECTS_FILE)
+        projects = get_backend().load_projects()
         project = projects.get(str(project_id))
 
         if not project or project["status"] != "active":
             await ctx.send(f"❌ Project with ID {project_id} is not active or does not exist.", delete_after=15)
             return
 
-        inventory = load_json(f"{INVENTORY_DIR}/{character_name.lower()}.json")
+        inventory = load_inventory(character_name)
         current_phase = project["phases"][project["current_phase_index"]]
         resource = resource.title()
 
@@ -98,11 +112,10 @@ class GroupProjects(commands.Cog):
         if inventory["items"][actual_item] <= 0:
             del inventory["items"][actual_item]
 
-        current_phase["contributed"][resource] += amount
-        project["contributors"].setdefault(character_name, []).append({"item": actual_item, "amount": amount})
+        ledger.record(project, character_name, resource, amount, item=actual_item)
 
-        save_json(f"{INVENTORY_DIR}/{character_name.lower()}.json", inventory)
-        save_json(ACTIVE_PROJECTS_FILE, projects)
+        save_inventory(character_name, inventory)
+        get_backend().upsert_project(project)
 
         await ctx.send(
             f"✅ {character_name} contributed {amount} {actual_item} to project {project['name']} (ID: {project_id}).",
@@ -116,36 +129,35 @@ class GroupProjects(commands.Cog):
             await ctx.send(f"❌ You cannot work more than {MAX_HOURS_PER_WORK} hours at a time.", delete_after=10)
             return
 
-        inventory = load_json(f"{INVENTORY_DIR}/{character_name.lower()}.json")
+        inventory = load_inventory(character_name)
 
         if any(inventory.get(task) for task in
                ["active_crafting", "active_scavenge", "active_disassembling", "active_labor"]):
             await ctx.send(f"❌ {character_name} is already busy with another task.", delete_after=15)
             return
 
-        projects = load_json(ACTIVE_PROJECTS_FILE)
+        projects = get_backend().load_projects()
         project = projects.get(str(project_id))
 
         if not project or project["status"] != "active":
             await ctx.send(f"❌ Project with ID {project_id} is not active or does not exist.", delete_after=15)
             return
 
-        end_time = datetime.utcnow() + timedelta(hours=hours)
-
         inventory["active_labor"] = {
             "project_id": project_id,
             "labor_amount": hours,
-            "completion_time": end_time.strftime("%Y-%m-%d %H:%M:%S")
+            "completion_time": time.time() + hours * 3600  # UTC epoch seconds
         }
 
-        save_json(f"{INVENTORY_DIR}/{character_name.lower()}.json", inventory)
+        save_inventory(character_name, inventory)
+        scheduler.schedule("labor", normalize_character_name(character_name), inventory["active_labor"]["completion_time"])
         await ctx.send(f"🛠️ {character_name} is now laboring on project {project_id} for {hours} hours.",
                        delete_after=15)
 
     @commands.command(name="check_project")
     async def check_project(self, ctx, project_id: int):
         """Check project progress and update it if the requirements are met."""
-        projects = load_json(ACTIVE_PROJECTS_FILE)
+        projects = get_backend().load_projects()
         project = projects.get(str(project_id))
         if not project:
             await ctx.send(f"❌ Project with ID {project_id} does not exist.", delete_after=15)
@@ -166,22 +178,17 @@ class GroupProjects(commands.Cog):
             await ctx.send(f"❌ Invalid phase index for project {project_id}.", delete_after=15)
             return
 
-        current_phase = project["phases"][current_phase_index]
-        required = current_phase.get("required", {})
-        contributed = current_phase.get("contributed", {})
-
-        # Determine the update information by checking if all requirements are met.
-        if all(contributed.get(resource, 0) >= amount for resource, amount in required.items()):
-            if current_phase_index + 1 < len(project["phases"]):
-                project["current_phase_index"] += 1
-                new_phase = project["phases"][project["current_phase_index"]]
-                update_info = f"✅ Requirements met! Advancing to phase: **{new_phase['phase']}**."
-            else:
-                project["status"] = "completed"
-                update_info = "✅ Requirements met! Project **completed**!"
-            save_json(ACTIVE_PROJECTS_FILE, projects)
+        # Advance if the current phase's requirements are met.
+        result = advance_project(project)
+        if result == "advanced":
+            new_phase = project["phases"][project["current_phase_index"]]
+            update_info = f"✅ Requirements met! Advancing to phase: **{new_phase['phase']}**."
+        elif result == "completed":
+            update_info = "✅ Requirements met! Project **completed**!"
         else:
             update_info = "❌ Requirements are not yet met for the current phase."
+        if result is not None or ledger.migrate(project):
+            get_backend().upsert_project(project)
 
         # Build the final status message.
         if project.get("status") == "completed":
@@ -199,7 +206,7 @@ class GroupProjects(commands.Cog):
             )
             status_message = (
                 f"**Project: {project['name']} (ID: {project['id']})**\n"
-                f"Status: {project['status']}\n"
+                f"Status: {project['status']} ({percent_complete(project):.0f}% complete)\n"
                 f"Current Phase: {current_phase['phase']}\n"
                 f"Requirements:\n{req_list}\n"
                 f"{update_info}"
@@ -207,14 +214,29 @@ class GroupProjects(commands.Cog):
 
         await ctx.send(status_message, delete_after=15)
 
-    @tasks.loop(minutes=1)
-    async def check_labor_completion(self):
-        """Process completed labor every minute."""
-        check_labor_completion(self.bot)
+    @commands.command(name="project_leaderboard")
+    async def project_leaderboard(self, ctx, project_id: int):
+        """Show the top contributors to a project."""
+        projects = get_backend().load_projects()
+        project = projects.get(str(project_id))
+        if not project:
+            await ctx.send(f"❌ Project with ID {project_id} does not exist.", delete_after=15)
+            return
+
+        top = ledger.leaderboard(project, LEADERBOARD_SIZE)
+        if not top:
+            await ctx.send(f"📜 Nobody has contributed to **{project['name']}** yet.", delete_after=15)
+            return
+
+        response = f"**🏆 Top Contributors: {project['name']} (ID: {project['id']})**\n"
+        for rank, (character_name, points, totals) in enumerate(top, start=1):
+            given = ", ".join(f"{amount} {resource}" for resource, amount in totals.items())
+            response += f"{rank}. **{character_name}** - {points:.1f}% of the project ({given})\n"
+        await ctx.send(response, delete_after=30)
 
-    @check_labor_completion.before_loop
-    async def before_check_labor_completion(self):
-        await self.bot.wait_until_ready()
+    async def complete_labor(self, character_names):
+        """Process labor the scheduler reports as due."""
+        check_labor_completion(self.bot, character_names)
 
 
 async def setup(bot):
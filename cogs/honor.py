@@ -1,39 +1,6 @@
 from discord.ext import commands
 import json
-import os
-
-# Directory where character inventories are stored
-INVENTORY_DIR = "data/inventories/"
-
-
-def normalize_character_name(name: str) -> str:
-    """Normalize a character name by trimming whitespace and capitalizing the first letter."""
-    return name.strip().lower().capitalize()
-
-
-def get_inventory_file(character_name: str) -> str:
-    """Return the file path for a character's JSON file."""
-    normalized = normalize_character_name(character_name)
-    return os.path.join(INVENTORY_DIR, f"{normalized}.json")
-
-
-def load_character(character_name: str) -> dict:
-    """Load a character's data from its JSON file. Returns None if the file doesn't exist."""
-    normalized = normalize_character_name(character_name)
-    file_path = get_inventory_file(normalized)
-    if not os.path.exists(file_path):
-        return None
-    with open(file_path, "r") as f:
-        return json.load(f)
-
-
-def save_character(character_name: str, data: dict):
-    """Save a character's data to its JSON file."""
-    normalized = normalize_character_name(character_name)
-    os.makedirs(INVENTORY_DIR, exist_ok=True)
-    file_path = get_inventory_file(normalized)
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=4)
+from utils.inventory import normalize_character_name, load_character, save_inventory
 
 
 class HonorCog(commands.Cog):
@@ -71,7 +38,7 @@ class HonorCog(commands.Cog):
             data["honor"] = 0
 
         data["honor"] += honor_amount
-        save_character(normalized_char, data)
+        save_inventory(normalized_char, data)
         await ctx.send(f"✅ Awarded {honor_amount} Honor to {normalized_char}. ``Total: {data['honor']}", delete_after=5)
 
     @honor.command(name="consume")
@@ -105,7 +72,7 @@ class HonorCog(commands.Cog):
         xp_gain = 25 * honor_amount
         data["total_xp"] += xp_gain
 
-        save_character(normalized_char, data)
+        save_inventory(normalized_char, data)
         await ctx.send(f"✅ {normalized_char} consumed {honor_amount} Honor and gained {xp_gain} XP. Remaining Honor: {data['honor']}", delete_after=5)
 
 
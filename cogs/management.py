@@ -1,9 +1,7 @@
-import os
-import json
 import asyncio
 from discord.ext import commands
+from utils.inventory import load_character, save_inventory, delete_character, iter_characters
 
-INVENTORY_DIR = "data/inventories/"
 MAX_CHARACTERS_PER_USER = 10
 
 # Template for new character profiles
@@ -15,45 +13,19 @@ CHARACTER_TEMPLATE = {
     "total_gold": 0,
     "items": {},
     "active_crafting": None,
+    "crafting_queue": [],
     "active_scavenge": None,
     "active_disassembling": None,
     "active_labor": None
 }
 
 
-def get_inventory_file(character_name):
-    return os.path.join(INVENTORY_DIR, f"{character_name.lower()}.json")
-
-
-def load_inventory(character_name):
-    file_path = get_inventory_file(character_name)
-    if not os.path.exists(file_path):
-        return None
-    with open(file_path, "r") as f:
-        return json.load(f)
-
-
-def save_inventory(character_name, inventory):
-    os.makedirs(INVENTORY_DIR, exist_ok=True)
-    with open(get_inventory_file(character_name), "w") as f:
-        json.dump(inventory, f, indent=4)
-
-
 def list_user_characters(user_id):
     """Return a list of character names that belong to a given user ID."""
     characters = []
-    if not os.path.exists(INVENTORY_DIR):
-        return characters
-    for filename in os.listdir(INVENTORY_DIR):
-        if filename.endswith(".json"):
-            file_path = os.path.join(INVENTORY_DIR, filename)
-            try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                if data.get("user_id") == user_id:
-                    characters.append(data.get("character_name", filename[:-5]))
-            except Exception as e:
-                print(f"[DEBUG] Failed to load {filename}: {e}")
+    for name, data in iter_characters():
+        if data.get("user_id") == user_id:
+            characters.append(data.get("character_name", name))
     return characters
 
 
@@ -74,7 +46,7 @@ class Management(commands.Cog):
         """
         character_name = character_name.strip()
         # Check if the character already exists
-        if load_inventory(character_name) is not None:
+        if load_character(character_name) is not None:
             await ctx.send(f"❌ Character **{character_name}** already exists.", delete_after=10)
             return
 
@@ -95,6 +67,7 @@ class Management(commands.Cog):
         new_character["total_gold"] = 0
         new_character["inventory"] = {}  # Inventory section where the items will go
         new_character["active_crafting"] = None
+        new_character["crafting_queue"] = []
         new_character["active_scavenge"] = None
         new_character["active_disassembling"] = None
         new_character["active_labor"] = None
@@ -119,7 +92,7 @@ class Management(commands.Cog):
         Usage: !death <character name>\nExample: !death Taco
         """
         character_name = character_name.strip()
-        inventory = load_inventory(character_name)
+        inventory = load_character(character_name)
         if inventory is None:
             await ctx.send(f"❌ Character **{character_name}** does not exist.", delete_after=10)
             return
@@ -148,9 +121,8 @@ class Management(commands.Cog):
         try:
             reaction, user = await self.bot.wait_for("reaction_add", timeout=30.0, check=check)
             if str(reaction.emoji) == "👍":
-                file_path = get_inventory_file(character_name)
                 try:
-                    os.remove(file_path)
+                    delete_character(character_name)
                     await ctx.send(f"✅ Character **{character_name}** has been deleted.", delete_after=10)
                 except Exception as e:
                     await ctx.send(f"❌ Failed to delete character **{character_name}**.", delete_after=10)
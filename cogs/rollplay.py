@@ -1,42 +1,22 @@
 import os
-import json
-from typing import Any
 import aiohttp
 from PIL import Image
 import io
 from discord.ext import commands
 import discord
+from utils.inventory import normalize_character_name, load_character
 
-INVENTORY_DIR = "data/inventories/"
 AVATAR_DIR = "data/avatars/"
 LOGGING_CHANNEL_ID = 1333897746444193886  # Replace with your private logging channel ID
 
-os.makedirs(INVENTORY_DIR, exist_ok=True)
 os.makedirs(AVATAR_DIR, exist_ok=True)
 
 
-def normalize_character_name(name: str) -> str:
-    return name.strip().lower().capitalize()
-
-
-def get_inventory_file(character_name: str) -> str:
-    normalized = normalize_character_name(character_name)
-    return os.path.join(INVENTORY_DIR, f"{normalized}.json")
-
-
 def get_avatar_file(character_name: str) -> str:
     normalized = normalize_character_name(character_name)
     return os.path.join(AVATAR_DIR, f"{normalized}.png")
 
 
-def load_character(character_name: str) -> Any | None:
-    file_path = get_inventory_file(character_name)
-    if not os.path.exists(file_path):
-        return None
-    with open(file_path, "r") as f:
-        return json.load(f)
-
-
 class RoleplayCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
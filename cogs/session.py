@@ -1,12 +1,10 @@
-import os
 import json
 import logging
 from discord.ext import commands
 import discord
 import asyncio
-from utils.inventory import load_inventory, save_inventory
+from utils.inventory import load_character, save_inventory, iter_characters
 
-INVENTORY_DIR = "data/inventories/"
 MAX_MESSAGE_LENGTH = 1500
 
 
@@ -34,7 +32,7 @@ class Session(commands.Cog):
         """Log a session entry that updates the character's XP and gold."""
         await ctx.message.delete(delay=0)
         character_name = character_name.strip().lower().capitalize()
-        char_data = load_inventory(character_name)
+        char_data = load_character(character_name)
 
         if char_data is None:
             await ctx.send(f"❌ Character **{character_name}** does not exist.", delete_after=10)
@@ -70,16 +68,9 @@ class Session(commands.Cog):
         await ctx.message.delete(delay=0)
         user_chars = []
 
-        if not os.path.exists(INVENTORY_DIR):
-            await ctx.send("You have no characters in the database.", delete_after=5)
-            return
-
-        for filename in os.listdir(INVENTORY_DIR):
-            if filename.endswith(".json"):
-                char_name = filename[:-5]
-                char_data = load_inventory(char_name)
-                if char_data.get("discord_name") == ctx.author.name:
-                    user_chars.append((char_name, char_data.get("total_xp", 0), char_data.get("total_gold", 0)))
+        for char_name, char_data in iter_characters():
+            if char_data.get("discord_name") == ctx.author.name:
+                user_chars.append((char_name, char_data.get("total_xp", 0), char_data.get("total_gold", 0)))
 
         if not user_chars:
             await ctx.send("You have no characters in the database.", delete_after=5)
@@ -95,7 +86,7 @@ class Session(commands.Cog):
         """Display detailed information about a character (XP, gold, items) and DM inventory upon reaction."""
         await ctx.message.delete(delay=0)
         character_name = character_name.strip().lower().capitalize()
-        char_data = load_inventory(character_name)
+        char_data = load_character(character_name)
 
         if char_data is None:
             await ctx.send(f"❌ Character **{character_name}** does not exist.", delete_after=10)
@@ -135,7 +126,7 @@ class Session(commands.Cog):
     async def dm_inventory(self, ctx, character_name, char_data=None):
         """DM the full inventory contents to the user in chunks."""
         if char_data is None:
-            char_data = load_inventory(character_name)
+            char_data = load_character(character_name)
 
         if char_data is None:
             await ctx.send(f"❌ Character **{character_name}** does not exist.", delete_after=10)
@@ -1,40 +1,18 @@
-import json
-import os
+import time
 import uuid
-from datetime import datetime, timedelta
-from discord.ext import commands, tasks
-from utils.inventory import normalize_character_name, load_inventory, save_inventory
+from fractions import Fraction
+import discord
+from datetime import datetime
+from discord.ext import commands
+from utils.inventory import normalize_character_name, load_inventory
+from utils.trade_book import trade_book, trade_expiry, TRADE_LIFETIME
+from utils.transactions import transaction
+from utils.scheduler import scheduler
+from utils.market import market
 
 # Constants
-INVENTORY_DIR = "data/inventories/"
-TRADE_PROPOSALS_FILE = "data/trade_proposals.json"
 TRADING_CHANNEL_ID = 1336354629109289092  # Replace with your actual trading channel ID
-
-
-# --- Trade Proposal Helper Functions ---
-def load_trade_proposals() -> list:
-    """Load trade proposals from file."""
-    if not os.path.isfile(TRADE_PROPOSALS_FILE):
-        print(f"[DEBUG] load_trade_proposals: File '{TRADE_PROPOSALS_FILE}' not found. Returning empty list.")
-        return []
-    try:
-        with open(TRADE_PROPOSALS_FILE, "r") as f:
-            proposals = json.load(f)
-            print(f"[DEBUG] load_trade_proposals: Loaded {len(proposals)} proposals.")
-            return proposals
-    except Exception as e:
-        print(f"[DEBUG] load_trade_proposals: Error reading '{TRADE_PROPOSALS_FILE}': {e}")
-        return []
-
-
-def save_trade_proposals(trades: list):
-    """Save trade proposals to file."""
-    try:
-        with open(TRADE_PROPOSALS_FILE, "w") as f:
-            json.dump(trades, f, indent=4)
-        print(f"[DEBUG] save_trade_proposals: Successfully saved {len(trades)} trade proposals.")
-    except Exception as e:
-        print(f"[DEBUG] save_trade_proposals: Error saving proposals to '{TRADE_PROPOSALS_FILE}': {e}")
+ANNOUNCE_EXPIRED_TRADES = True  # Post a notice in the trading channel when a proposal expires
 
 
 # --- Parsing Helper ---
@@ -71,6 +49,8 @@ def parse_trade_args(args: list) -> tuple:
             break
     if requested_amount is None or j is None or j == 0:
         raise ValueError("Requested amount or requested item missing.")
+    if offered_amount == 0 or requested_amount == 0:
+        raise ValueError("Amounts must be at least 1.")
     requested_item = " ".join(remaining[:j])
     print(
         f"[DEBUG] parse_trade_args: Parsed offered_item='{offered_item}', offered_amount={offered_amount}, "
@@ -78,49 +58,161 @@ def parse_trade_args(args: list) -> tuple:
     return offered_item, offered_amount, requested_item, requested_amount
 
 
+# --- Settlement ---
+def _holding(data: dict, item: str) -> int:
+    """How much of an item (or Gold) a character holds."""
+    if item.lower() == "gold":
+        return data.get("total_gold", 0)
+    return data.get("items", {}).get(item, 0)
+
+
+def _transfer(giver: dict, receiver: dict, item: str, amount: int):
+    """Move an item (or Gold) between two characters' data."""
+    if item.lower() == "gold":
+        giver["total_gold"] = giver.get("total_gold", 0) - amount
+        receiver["total_gold"] = receiver.get("total_gold", 0) + amount
+    else:
+        giver.setdefault("items", {})[item] = giver["items"].get(item, 0) - amount
+        receiver.setdefault("items", {})[item] = receiver["items"].get(item, 0) + amount
+
+
+async def settle_trade(trade_id: str, acceptor: str):
+    """
+    Settle an open trade with the given (normalized) accepting character.
+
+    Runs as one transaction over the proposer and the acceptor: both characters are locked, the trade is looked up
+    again under the lock (so two accepts of the same trade can't both succeed), both sides are checked, the offered
+    and requested items or gold are swapped, and both characters plus the trade's removal are committed with a
+    single durable write. Returns None on success, or a message explaining why the trade could not be settled, in
+    which case nothing has changed.
+    """
+    trade = trade_book.get(trade_id)
+    if not trade:
+        return "Trade not found or already completed."
+
+    async with transaction(trade["character"], acceptor) as tx:
+        if trade_book.get(trade_id) is not trade:
+            tx.rollback()
+            msg = "Trade not found or already completed."
+            print(f"[DEBUG] settle_trade: {msg}")
+            return msg
+
+        proposer_data = tx.character(trade["character"])
+        acceptor_data = tx.character(acceptor)
+        if proposer_data is None:
+            tx.rollback()
+            msg = f"Proposer character '{trade['character']}' not found."
+            print(f"[DEBUG] settle_trade: {msg}")
+            return msg
+        if acceptor_data is None:
+            tx.rollback()
+            msg = f"Acceptor character '{acceptor}' not found."
+            print(f"[DEBUG] settle_trade: {msg}")
+            return msg
+
+        # Check if acceptor has the requested item/gold
+        available_req = _holding(acceptor_data, trade["request_item"])
+        if available_req < trade["request_amount"]:
+            tx.rollback()
+            msg = f"'{acceptor}' does not have enough {trade['request_item']}. Has: {available_req}"
+            print(f"[DEBUG] settle_trade: {msg}")
+            return msg
+
+        # Verify proposer still has the offered item/gold
+        available_offer = _holding(proposer_data, trade["offer_item"])
+        if available_offer < trade["offer_amount"]:
+            tx.rollback()
+            msg = f"Proposer '{trade['character']}' does not have enough {trade['offer_item']}. Has: {available_offer}"
+            print(f"[DEBUG] settle_trade: {msg}")
+            return msg
+
+        _transfer(proposer_data, acceptor_data, trade["offer_item"], trade["offer_amount"])
+        print(f"[DEBUG] settle_trade: Transferred {trade['offer_amount']} {trade['offer_item']} "
+              f"from '{trade['character']}' to '{acceptor}'")
+        _transfer(acceptor_data, proposer_data, trade["request_item"], trade["request_amount"])
+        print(f"[DEBUG] settle_trade: Transferred {trade['request_amount']} {trade['request_item']} "
+              f"from '{acceptor}' to '{trade['character']}'")
+        tx.delete_trade(trade_id)
+
+    # Committed: drop the trade from the in-memory book (storage already has it deleted).
+    trade_book.remove(trade_id, persist=False)
+    scheduler.cancel("trade_expiry", trade_id)
+    try:
+        market.record(trade, acceptor)
+    except Exception as e:
+        # The trade has already settled; losing its history entry must not turn it into a failure.
+        print(f"[DEBUG] settle_trade: Unable to record trade '{trade_id}' in the market history: {e}")
+    print(f"[DEBUG] settle_trade: Trade '{trade_id}' processed and removed from proposals.")
+    return None
+
+
+async def match_trade(trade: dict) -> list:
+    """
+    Fill an incoming proposal against resting proposals on the opposite side of its item pair.
+
+    Resting trades offering what this one requests, at its rate or better, are taken best rate first (oldest first
+    within a rate) and settled whole, at the resting trade's terms, with the incoming character as acceptor. The
+    incoming trade's amounts are reduced by each fill. Returns the resting trades that were settled.
+    """
+    fills = []
+    min_rate = Fraction(trade["request_amount"], trade["offer_amount"])
+    for resting in trade_book.best_offers(trade["request_item"], trade["offer_item"], min_rate):
+        if trade["request_amount"] <= 0:
+            break
+        if resting["character"] == trade["character"] or resting["request_amount"] > trade["offer_amount"]:
+            continue
+        if await settle_trade(resting["id"], trade["character"]) is None:
+            fills.append(resting)
+            trade["offer_amount"] -= resting["request_amount"]
+            trade["request_amount"] -= resting["offer_amount"]
+    print(f"[DEBUG] match_trade: Filled {len(fills)} resting trade(s) for '{trade['id']}'.")
+    return fills
+
+
 # --- Trading Cog ---
 class Trading(commands.Cog):
     """Trading system with extensive debug logging for proposals and acceptance."""
 
     def __init__(self, bot):
         self.bot = bot
+        scheduler.register("trade_expiry", self.expire_trades)
         print("[DEBUG] Trading Cog Initialized")
 
     async def cog_load(self):
-        print("[DEBUG] Trading Cog Loaded; starting cleanup task.")
-        self.cleanup_trades.start()
-
-    def cog_unload(self):
-        print("[DEBUG] Trading Cog Unloaded. Stopping cleanup task.")
-        self.cleanup_trades.cancel()
-
-    @tasks.loop(hours=1)
-    async def cleanup_trades(self):
-        """Removes expired trade proposals older than one week."""
-        print("[DEBUG] cleanup_trades: Running trade cleanup task.")
-        trades = load_trade_proposals()
-        now = datetime.utcnow()
-        updated_trades = []
-        channel = self.bot.get_channel(TRADING_CHANNEL_ID)
-        for trade in trades:
-            try:
-                trade_time = datetime.fromisoformat(trade["timestamp"])
-            except Exception as e:
-                print(f"[DEBUG] cleanup_trades: Error parsing timestamp for trade '{trade.get('id', 'unknown')}': {e}")
+        # Every open proposal gets an expiry job; the scheduler fires each one exactly when it is due.
+        for trade in trade_book.open_trades():
+            scheduler.schedule("trade_expiry", trade["id"], trade_expiry(trade))
+        print(f"[DEBUG] Trading Cog Loaded; scheduled expiry for {len(trade_book)} open trade(s).")
+
+    async def expire_trades(self, trade_ids):
+        """Remove the proposals the scheduler reports as expired (one small delete each), then post one notice."""
+        now = time.time()
+        expired = []
+        for trade_id in trade_ids:
+            trade = trade_book.get(trade_id)
+            if trade is None:
+                continue  # Accepted or cancelled in the meantime
+            expires_at = trade_expiry(trade)
+            if expires_at > now:
+                scheduler.schedule("trade_expiry", trade_id, expires_at)
                 continue
-            if now - trade_time > timedelta(weeks=1) and trade["status"] == "open":
-                print(f"[DEBUG] cleanup_trades: Removing expired trade '{trade['id']}'")
-                if channel:
-                    await channel.send(f"ℹ️ Trade `{trade['id']}` expired and was removed.")
-            else:
-                updated_trades.append(trade)
-        save_trade_proposals(updated_trades)
-        print("[DEBUG] cleanup_trades: Cleanup complete.")
+            print(f"[DEBUG] expire_trades: Removing expired trade '{trade_id}'")
+            trade_book.remove(trade_id)
+            if expires_at:
+                expired.append(trade_id)  # Trades without a readable timestamp are dropped silently, as before
 
-    @cleanup_trades.before_loop
-    async def before_cleanup(self):
-        print("[DEBUG] cleanup_trades: Waiting for bot to be ready before starting cleanup task.")
-        await self.bot.wait_until_ready()
+        channel = self.bot.get_channel(TRADING_CHANNEL_ID) if ANNOUNCE_EXPIRED_TRADES else None
+        if not channel or not expired:
+            return
+        lines = [f"ℹ️ Trade `{trade_id}` expired and was removed." for trade_id in expired]
+        while lines:
+            message = lines.pop(0)
+            while lines and len(message) + len(lines[0]) < 1900:  # Discord caps messages at 2000 characters
+                message += "\n" + lines.pop(0)
+            try:
+                await channel.send(message)
+            except discord.HTTPException as e:
+                print(f"[DEBUG] expire_trades: Unable to post expiry notice: {e}")
 
     @commands.group(name="trade", invoke_without_command=True)
     async def trade(self, ctx):
@@ -131,7 +223,13 @@ class Trading(commands.Cog):
             "`!trade proposal <character_name> <offered item> <offered amount> <requested item> <requested amount>`\n"
             "Example: `!trade proposal Taco Mulberry Log 2 Gold 1`\n\n"
             "To accept a trade, use:\n"
-            "`!trade accept <character accepting the trade> <trade_id>`"
+            "`!trade accept <character accepting the trade> <trade_id>`\n\n"
+            "To have a proposal matched against open trades automatically, use:\n"
+            "`!trade auto <character_name> <offered item> <offered amount> <requested item> <requested amount>`\n\n"
+            "To cancel one of your own proposals, use:\n"
+            "`!trade cancel <trade_id>`\n\n"
+            "To list open trades (optionally only those offering or requesting an item), use:\n"
+            "`!trade list [item]`"
         )
         print(f"[DEBUG] trade: Showing trade instructions to {ctx.author}")
         await ctx.message.delete(delay=0)
@@ -144,6 +242,20 @@ class Trading(commands.Cog):
         Format: <character_name> <offered item> <offered amount> <requested item> <requested amount>
         Example: !trade proposal Taco Mulberry Log 2 Gold 1
         """
+        await self.submit_proposal(ctx, character_name, args_str, auto=False)
+
+    @trade.command(name="auto")
+    async def auto(self, ctx, character_name: str, *, args_str: str):
+        """
+        Propose a trade and let the matching engine settle it against open proposals right away.
+        Format: <character_name> <offered item> <offered amount> <requested item> <requested amount>
+        Example: !trade auto Taco Gold 1 Mulberry Log 2
+        Open proposals offering the requested item at this rate or better are filled whole, best rate first.
+        Whatever is left over is posted as a normal proposal.
+        """
+        await self.submit_proposal(ctx, character_name, args_str, auto=True)
+
+    async def submit_proposal(self, ctx, character_name: str, args_str: str, auto: bool):
         normalized_char = normalize_character_name(character_name)
         print(
             f"[DEBUG] proposal: Received proposal from '{ctx.author}' for character '{normalized_char}' with args_str: '{args_str}'")
@@ -199,15 +311,33 @@ class Trading(commands.Cog):
             "request_item": requested_item,
             "request_amount": requested_amount,
             "status": "open",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow().isoformat(),
+            "expires_at": time.time() + TRADE_LIFETIME.total_seconds()  # UTC epoch seconds
         }
+
+        channel = self.bot.get_channel(TRADING_CHANNEL_ID)
+        if auto:
+            fills = await match_trade(trade)
+            for filled in fills:
+                if channel:
+                    await channel.send(
+                        f"🤝 Trade `{filled['id']}` was matched automatically: **{filled['character']}** gave "
+                        f"**{filled['offer_amount']} {filled['offer_item']}** to **{normalized_char}** for "
+                        f"**{filled['request_amount']} {filled['request_item']}**.")
+            if trade["request_amount"] <= 0 or trade["offer_amount"] <= 0:
+                await ctx.send(f"✅ Your trade was filled by {len(fills)} open proposal(s).", delete_after=15)
+                return
+            if fills:
+                await ctx.send(
+                    f"✅ {len(fills)} open proposal(s) matched; posting the rest as a proposal.", delete_after=15)
+            offered_amount, requested_amount = trade["offer_amount"], trade["request_amount"]
+            trade["auto"] = True
+
         print(f"[DEBUG] proposal: Creating trade proposal: {trade}")
-        trades = load_trade_proposals()
-        trades.append(trade)
-        save_trade_proposals(trades)
+        trade_book.add(trade)
+        scheduler.schedule("trade_expiry", trade_id, trade["expires_at"])
         print(f"[DEBUG] proposal: Trade proposal saved with ID: {trade_id}")
 
-        channel = self.bot.get_channel(TRADING_CHANNEL_ID)
         if channel is None:
             msg = "Trading channel not found."
             print(f"[DEBUG] proposal: {msg}")
@@ -238,8 +368,7 @@ class Trading(commands.Cog):
 
         await ctx.message.delete(delay=0)
 
-        trades = load_trade_proposals()
-        trade = next((t for t in trades if t["id"] == trade_id and t["status"] == "open"), None)
+        trade = trade_book.get(trade_id)
         if not trade:
             msg = "Trade not found or already completed."
             print(f"[DEBUG] accept: {msg}")
@@ -247,126 +376,61 @@ class Trading(commands.Cog):
             return
 
         print(f"[DEBUG] accept: Found trade: {trade}")
-
-        # Load inventories for proposer and acceptor
-        proposer_data = load_inventory(trade["character"])
-        acceptor_data = load_inventory(normalized_acceptor)
-        if not proposer_data:
-            msg = f"Proposer character '{trade['character']}' not found."
-            print(f"[DEBUG] accept: {msg}")
+        msg = await settle_trade(trade_id, normalized_acceptor)
+        if msg:
             await ctx.send(f"⚠️ {msg}", delete_after=15)
             return
-        if not acceptor_data:
-            msg = f"Acceptor character '{normalized_acceptor}' not found."
-            print(f"[DEBUG] accept: {msg}")
-            await ctx.send(f"⚠️ {msg}", delete_after=15)
-            return
-
-        print(f"[DEBUG] accept: Proposer data: {proposer_data}")
-        print(f"[DEBUG] accept: Acceptor data: {acceptor_data}")
 
-        # Check if acceptor has the requested item/gold
-        if trade["request_item"].lower() == "gold":
-            if acceptor_data.get("total_gold", 0) < trade["request_amount"]:
-                msg = f"'{normalized_acceptor}' does not have enough Gold. Has: {acceptor_data.get('total_gold', 0)}"
-                print(f"[DEBUG] accept: {msg}")
-                await ctx.send(f"⚠️ {msg}", delete_after=15)
-                return
-        else:
-            available_req = acceptor_data.get("items", {}).get(trade["request_item"], 0)
-            if available_req < trade["request_amount"]:
-                msg = f"'{normalized_acceptor}' does not have enough {trade['request_item']}. Has: {available_req}"
-                print(f"[DEBUG] accept: {msg}")
-                await ctx.send(f"⚠️ {msg}", delete_after=15)
-                return
+        # Log success in trading channel
+        channel = self.bot.get_channel(TRADING_CHANNEL_ID)
+        if channel:
+            await channel.send(
+                f"✅ Trade `{trade_id}` successfully completed.")
+        await ctx.send(f"✅ Trade `{trade_id}` successfully completed.", delete_after=15)
 
-        # Verify proposer still has the offered item/gold
-        if trade["offer_item"].lower() == "gold":
-            if proposer_data.get("total_gold", 0) < trade["offer_amount"]:
-                msg = f"Proposer '{trade['character']}' does not have enough Gold. Has: {proposer_data.get('total_gold', 0)}"
-                print(f"[DEBUG] accept: {msg}")
-                await ctx.send(f"⚠️ {msg}", delete_after=15)
-                return
-        else:
-            available_offer = proposer_data.get("items", {}).get(trade["offer_item"], 0)
-            if available_offer < trade["offer_amount"]:
-                msg = f"Proposer '{trade['character']}' does not have enough {trade['offer_item']}. Has: {available_offer}"
-                print(f"[DEBUG] accept: {msg}")
-                await ctx.send(f"⚠️ {msg}", delete_after=15)
-                return
+    @trade.command(name="cancel")
+    async def trade_cancel(self, ctx, trade_id: str):
+        """
+        Withdraw one of your own open trade proposals.
+        Command format: !trade cancel <trade_id>
+        """
+        print(f"[DEBUG] cancel: '{ctx.author}' attempting to cancel trade '{trade_id}'")
+        await ctx.message.delete(delay=0)
 
-        # Process trade: Transfer offered item/gold from proposer to acceptor
-        try:
-            if trade["offer_item"].lower() == "gold":
-                proposer_data["total_gold"] -= trade["offer_amount"]
-                acceptor_data["total_gold"] = acceptor_data.get("total_gold", 0) + trade["offer_amount"]
-                print(
-                    f"[DEBUG] accept: Transferred {trade['offer_amount']} Gold from '{trade['character']}' to '{normalized_acceptor}'")
-            else:
-                proposer_current = proposer_data.get("items", {}).get(trade["offer_item"], 0)
-                proposer_data["items"][trade["offer_item"]] = proposer_current - trade["offer_amount"]
-                acceptor_current = acceptor_data.get("items", {}).get(trade["offer_item"], 0)
-                acceptor_data.setdefault("items", {})[trade["offer_item"]] = acceptor_current + trade["offer_amount"]
-                print(
-                    f"[DEBUG] accept: Transferred {trade['offer_amount']} {trade['offer_item']} from '{trade['character']}' to '{normalized_acceptor}'")
-        except Exception as e:
-            msg = f"Error during transfer of offered item: {e}"
-            print(f"[DEBUG] accept: {msg}")
+        trade = trade_book.get(trade_id)
+        if not trade:
+            msg = "Trade not found or already completed."
+            print(f"[DEBUG] cancel: {msg}")
             await ctx.send(f"⚠️ {msg}", delete_after=15)
             return
-
-        # Process trade: Transfer requested item/gold from acceptor to proposer
-        try:
-            if trade["request_item"].lower() == "gold":
-                acceptor_data["total_gold"] -= trade["request_amount"]
-                proposer_data["total_gold"] = proposer_data.get("total_gold", 0) + trade["request_amount"]
-                print(
-                    f"[DEBUG] accept: Transferred {trade['request_amount']} Gold from '{normalized_acceptor}' to '{trade['character']}'")
-            else:
-                acceptor_current = acceptor_data.get("items", {}).get(trade["request_item"], 0)
-                acceptor_data["items"][trade["request_item"]] = acceptor_current - trade["request_amount"]
-                proposer_current = proposer_data.get("items", {}).get(trade["request_item"], 0)
-                proposer_data.setdefault("items", {})[trade["request_item"]] = proposer_current + trade[
-                    "request_amount"]
-                print(
-                    f"[DEBUG] accept: Transferred {trade['request_amount']} {trade['request_item']} from '{normalized_acceptor}' to '{trade['character']}'")
-        except Exception as e:
-            msg = f"Error during transfer of requested item: {e}"
-            print(f"[DEBUG] accept: {msg}")
-            await ctx.send(f"⚠️ {msg}", delete_after=15)
+        if trade["owner"] != ctx.author.id:
+            msg = "You can only cancel your own trade proposals."
+            print(f"[DEBUG] cancel: {msg}")
+            await ctx.send(f"🚫 {msg}", delete_after=15)
             return
 
-        # Save updated inventories
-        save_inventory(trade["character"], proposer_data)
-        save_inventory(normalized_acceptor, acceptor_data)
-        print(
-            f"[DEBUG] accept: Saved updated data for proposer '{trade['character']}' and acceptor '{normalized_acceptor}'")
-
-        # Remove the trade proposal
-        updated_trades = [t for t in trades if t["id"] != trade_id]
-        save_trade_proposals(updated_trades)
-        print(f"[DEBUG] accept: Trade '{trade_id}' processed and removed from proposals.")
-
-        # Log success in trading channel
+        trade_book.remove(trade_id)
+        scheduler.cancel("trade_expiry", trade_id)
+        print(f"[DEBUG] cancel: Trade '{trade_id}' cancelled and removed from proposals.")
         channel = self.bot.get_channel(TRADING_CHANNEL_ID)
         if channel:
-            await channel.send(
-                f"✅ Trade `{trade_id}` successfully completed.")
-        await ctx.send(f"✅ Trade `{trade_id}` successfully completed.", delete_after=15)
+            await channel.send(f"ℹ️ Trade `{trade_id}` was cancelled by its proposer.")
+        await ctx.send(f"✅ Trade `{trade_id}` cancelled.", delete_after=15)
 
     @trade.command(name="list")
-    async def list_trades(self, ctx):
-        """List all open trade proposals."""
-        print(f"[DEBUG] list_trades: Command triggered by {ctx.author}")
-        trades = load_trade_proposals()
-        if not trades:
-            print("[DEBUG] list_trades: No trades found.")
-            await ctx.send("There are no open trades at the moment.")
-            return
-        open_trades = [t for t in trades if t["status"] == "open"]
+    async def list_trades(self, ctx, *, item: str = None):
+        """
+        List all open trade proposals.
+        With an item name, only list trades offering or requesting that item.
+        """
+        print(f"[DEBUG] list_trades: Command triggered by {ctx.author} (item filter: {item})")
+        open_trades = trade_book.involving(item) if item else trade_book.open_trades()
         if not open_trades:
             print("[DEBUG] list_trades: No open trades found.")
-            await ctx.send("There are no open trades at the moment.")
+            if item:
+                await ctx.send(f"There are no open trades for {item} at the moment.")
+            else:
+                await ctx.send("There are no open trades at the moment.")
             return
         output_lines = []
         for trade in open_trades:
@@ -381,6 +445,34 @@ class Trading(commands.Cog):
         await ctx.message.delete(delay=0)
         await ctx.send(message, delete_after=150)
 
+    @commands.command(name="market")
+    async def market_info(self, ctx, *, item: str):
+        """
+        Show price history for an item from settled trades.
+        Command format: !market <item>
+        """
+        await ctx.message.delete(delay=0)
+        stats = market.stats(item)
+        if stats is None:
+            await ctx.send(f"📭 No trades of {item} have been settled yet.", delete_after=30)
+            return
+
+        def price(value):
+            return "—" if value is None else f"{value:,.3f} Gold"
+
+        lines = [f"📈 **Market: {stats['name']}**",
+                 f"Last price: **{price(stats['last_price'])}**"
+                 + (f" (<t:{int(stats['last_time'])}:R>)" if stats["last_time"] else ""),
+                 f"All-time volume: {stats['volume']:,} over {stats['trades']:,} trade(s)"]
+        for window, label in (("hour", "Last hour"), ("day", "Last 24 hours")):
+            bucket = stats[window]
+            if bucket is None:
+                lines.append(f"{label}: no trades")
+                continue
+            lines.append(f"{label} (since <t:{bucket['start']}:f>): min {price(bucket['min'])}, max {price(bucket['max'])}, "
+                         f"VWAP {price(bucket['vwap'])}, volume {bucket['volume']:,}")
+        await ctx.send("\n".join(lines), delete_after=60)
+
 
 async def setup(bot):
     """Setup function for adding the Trading cog."""
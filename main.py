@@ -7,6 +7,8 @@ import shutil
 import atexit
 from datetime import datetime
 from discord.ext import commands, tasks
+from utils.store import store, FLUSH_INTERVAL_SECONDS
+from utils.scheduler import scheduler
 
 # ----------------------------
 # Logging Setup (Minimal Logging)
@@ -50,6 +52,7 @@ async def half_daily_backup():
 
 def create_backup():
     """Create a backup of the entire 'data' folder."""
+    store.flush()  # Make sure the backup includes changes that are still only in memory
     timestamp = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")  # Include time for uniqueness
     backup_folder = os.path.join(BACKUP_DIR, timestamp)
 
@@ -95,22 +98,7 @@ async def daily_inventory_cleanup():
     This runs once every 24 hours.
     """
     logging.info("Starting daily inventory cleanup.")
-    inventory_dir = "data/inventories/"
-    if not os.path.exists(inventory_dir):
-        logging.info("No inventory directory found; skipping cleanup.")
-        return
-
-    for filename in os.listdir(inventory_dir):
-        if not filename.endswith(".json"):
-            continue
-        file_path = os.path.join(inventory_dir, filename)
-        try:
-            with open(file_path, "r") as f:
-                inventory = json.load(f)
-        except Exception as e:
-            logging.error(f"Error reading inventory file {file_path}: {e}")
-            continue
-
+    for character_name, inventory in store.characters():
         if "items" in inventory:
             removed_items = []
             for item in list(inventory["items"].keys()):
@@ -118,14 +106,32 @@ async def daily_inventory_cleanup():
                     del inventory["items"][item]
                     removed_items.append(item)
             if removed_items:
-                try:
-                    with open(file_path, "w") as f:
-                        json.dump(inventory, f, indent=4)
-                    logging.info(f"Cleaned {filename}: removed items with 0 quantity: {', '.join(removed_items)}")
-                except Exception as e:
-                    logging.error(f"Error writing inventory file {file_path}: {e}")
+                store.mark_dirty(character_name)
+                logging.info(f"Cleaned {character_name}: removed items with 0 quantity: {', '.join(removed_items)}")
+    store.flush()
     logging.info("Daily inventory cleanup completed.")
 
+# ----------------------------
+# Character Store Flush (Write-Behind)
+# ----------------------------
+
+
+@tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+async def flush_character_store():
+    """Write characters changed since the last tick back to disk in one batch."""
+    try:
+        store.flush()
+    except Exception as e:
+        logging.error(f"⚠️ Error flushing character store: {e}")
+
+
+def shutdown_store():
+    """Flush any pending character changes before the process exits."""
+    store.flush()
+
+
+atexit.register(shutdown_store)
+
 # ----------------------------
 # Bot Setup
 # ----------------------------
@@ -179,6 +185,8 @@ async def on_ready():
     """Triggered when the bot connects to Discord."""
     logging.info(f"✅ Logged in as {bot.user}")
     print(f"✅ Logged in as {bot.user}")
+    # Start once channels are cached, so completions that are caught up on startup can still announce themselves.
+    await scheduler.start()
 
 # ----------------------------
 # Hourly Command Message Deletion Task
@@ -213,13 +221,17 @@ async def setup_hook():
     daily_inventory_cleanup.start()
     hourly_delete_command_messages.start()
     half_daily_backup.start()  # Start the backup task
-    logging.info("✅ Daily backup, inventory cleanup, and hourly deletion tasks started.")
+    flush_character_store.start()
+    logging.info("✅ Daily backup, inventory cleanup, hourly deletion and store flush tasks started.")
 
 
 async def main():
     """Main function to start the bot and load extensions."""
-    async with bot:
-        await load_cogs()
-        await bot.start(TOKEN)
+    try:
+        async with bot:
+            await load_cogs()
+            await bot.start(TOKEN)
+    finally:
+        store.flush()
 
 asyncio.run(main())
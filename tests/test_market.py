@@ -0,0 +1,38 @@
+import json
+from utils.market import Market
+
+DAY = 86400
+
+
+def _trade(trade_id, amount, gold):
+    return {"id": trade_id, "character": "Seller", "offer_item": "Rock", "offer_amount": amount,
+            "request_item": "Gold", "request_amount": gold}
+
+
+def test_rolling_stats_carry_over_hour_and_day_boundaries(tmp_path):
+    market = Market(str(tmp_path / "history.jsonl"), str(tmp_path / "snapshot.json"))
+    midnight = 100 * DAY
+    market.record(_trade(1, 10, 20), "Buyer", at=midnight - 1800)  # 2 gold each
+    market.record(_trade(2, 10, 40), "Buyer", at=midnight - 60)  # 4 gold each
+
+    stats = market.stats("rock", now=midnight + 60)
+    assert stats["hour"]["trades"] == 2 and stats["hour"]["start"] == midnight - 3600
+    assert (stats["day"]["min"], stats["day"]["max"], stats["day"]["vwap"]) == (2, 4, 3)
+    assert market.price("Rock") == 4  # Long after the trades, the last price
+
+    stats = market.stats("rock", now=midnight + 2 * 3600)
+    assert stats["hour"] is None and stats["day"]["volume"] == 20
+    assert market.stats("rock", now=midnight + DAY + 3600)["day"] is None
+
+
+def test_snapshot_with_dropped_granularity_loads(tmp_path):
+    history, snapshot = tmp_path / "history.jsonl", tmp_path / "snapshot.json"
+    history.write_text("")
+    bucket = {"min": 2, "max": 2, "gold": 20, "quantity": 10, "volume": 10, "trades": 1}
+    snapshot.write_text(json.dumps({"offset": 0, "items": {"rock": {
+        "name": "Rock", "last_price": 2, "last_time": 7200, "volume": 10, "trades": 1,
+        "buckets": {"hour": {"7200": bucket}, "day": {"0": bucket}}}}}))
+    market = Market(str(history), str(snapshot))
+    assert market.stats("Rock", now=7300)["day"]["vwap"] == 2
+    market.record(_trade(1, 5, 15), "Buyer", at=7400)
+    assert market.stats("Rock", now=7500)["hour"]["trades"] == 2
@@ -0,0 +1,93 @@
+import random
+from utils.overlaps import OverlapIndex, IntervalTree, WEEK_MINUTES, occurrences, sweep_windows
+
+
+def _windows(index):
+    return sorted((w["start"], w["end"], tuple(w["user_ids"])) for w in index.windows.values())
+
+
+def _full_sweep(entries, min_players):
+    return sorted((start, end, tuple(sorted(players, key=str)))
+                  for start, end, players in sweep_windows(entries, min_players))
+
+
+def test_sweep_windows_are_maximal():
+    entries = [{"user_id": "a", "start": 0, "end": 100}, {"user_id": "b", "start": 50, "end": 150},
+               {"user_id": "a", "start": 100, "end": 200}]
+    assert sweep_windows(entries, 2) == [(50, 150, frozenset({"a", "b"}))]
+
+
+def test_incremental_updates_match_full_sweep():
+    rng = random.Random(7)
+    for _ in range(300):
+        index = OverlapIndex(min_players=2)
+        index.load([], [])
+        live = {}
+        for step in range(25):
+            if live and rng.random() < 0.35:
+                entry_id = rng.choice(sorted(live))
+                del live[entry_id]
+                index.remove(entry_id)
+            else:
+                start = rng.randrange(0, 500)
+                entry = {"id": f"e{step}", "user_id": rng.choice("abcde"), "start": start,
+                         "end": start + rng.randrange(1, 120)}
+                live[entry["id"]] = entry
+                index.add(entry)
+            assert _windows(index) == _full_sweep(live.values(), 2)
+        assert len(index.tree) == len(live)
+
+
+def test_interval_tree_queries():
+    rng = random.Random(3)
+    tree = IntervalTree()
+    entries = []
+    for i in range(200):
+        start = rng.randrange(0, 1000)
+        entries.append({"id": str(i), "start": start, "end": start + rng.randrange(1, 100)})
+        tree.insert(entries[-1])
+    for entry in entries[::3]:
+        assert tree.remove(entry)
+    kept = [entry for i, entry in enumerate(entries) if i % 3]
+    for start, end in ((0, 10), (400, 450), (990, 1200)):
+        expected = {e["id"] for e in kept if e["start"] < end and start < e["end"]}
+        assert {e["id"] for e in tree.overlapping(start, end)} == expected
+    assert {e["id"] for e in tree.ending_before(500)} == {e["id"] for e in kept if e["end"] <= 500}
+
+
+def test_weekly_occurrence_boundaries():
+    rule = {"id": "r", "discord_name": "A", "user_id": "a", "recurrence": "weekly", "start": 100, "end": 200}
+    # An occurrence ending exactly at `after` is excluded; one starting exactly at `before` is too.
+    starts = [o["start"] for o in occurrences(rule, 200, 100 + 2 * WEEK_MINUTES)]
+    assert starts == [100 + WEEK_MINUTES]
+    # An occurrence in progress at `after` is included.
+    starts = [o["start"] for o in occurrences(rule, 150, 101)]
+    assert starts == [100]
+    # Nothing before the rule's first occurrence.
+    assert [o["start"] for o in occurrences(rule, -WEEK_MINUTES * 3, 201)] == [100]
+    occurrence = next(occurrences(rule, 0, 1000))
+    assert occurrence["id"] == "r@100" and occurrence["rule_id"] == "r" and occurrence["end"] == 200
+
+
+def test_extend_adds_each_occurrence_once():
+    rule = {"id": "r", "discord_name": "A", "user_id": "a", "recurrence": "weekly", "start": 100, "end": 200}
+    other = {"id": "o", "discord_name": "B", "user_id": "b", "recurrence": "weekly", "start": 150, "end": 300}
+    index = OverlapIndex(min_players=2)
+    index.load([rule, other], [], now=0)
+    for now in range(0, 5 * WEEK_MINUTES, 997):
+        index.extend(now)
+        ids = [e["id"] for e in index.entries.values()]
+        assert len(ids) == len(set(ids))
+        assert _windows(index) == _full_sweep(index.entries.values(), 2)
+    assert [e["id"] for e in index.stored()] == ["r", "o"]
+
+
+def test_best_windows_rank_by_remaining_time():
+    entries = [{"id": "1", "user_id": "a", "start": 0, "end": 600}, {"id": "2", "user_id": "b", "start": 0, "end": 600},
+               {"id": "3", "user_id": "a", "start": 1000, "end": 1300},
+               {"id": "4", "user_id": "b", "start": 1000, "end": 1300}]
+    index = OverlapIndex(min_players=2)
+    index.load(entries, [], now=0)
+    assert [w[:2] for w in index.best_windows(2, now=0)] == [(0, 600), (1000, 1300)]
+    assert [w[:2] for w in index.best_windows(2, now=550)] == [(1000, 1300), (550, 600)]
+    assert [w[:2] for w in index.best_windows(2, min_minutes=60, now=550)] == [(1000, 1300)]
@@ -0,0 +1,61 @@
+import os
+import json
+from utils.recipes import RecipeCatalog
+from utils.planner import RecipePlanner
+
+RECIPES_FILE = os.path.join(os.path.dirname(__file__), os.pardir, "data", "recipes.json")
+
+
+def test_every_recipe_expands_to_a_craft_plan():
+    catalog = RecipeCatalog(RECIPES_FILE)
+    planner = RecipePlanner(catalog)
+    recipes = catalog.all()
+    assert recipes
+    for recipe in recipes:
+        plan = planner.plan(recipe["name"], 2)
+        assert plan["crafts"], recipe["name"]
+        assert plan["crafts"][-1][0] == recipe["name"]
+        assert recipe["name"] not in plan["raw"]
+
+
+def test_recipe_without_outputs_runs_once_per_requested_item():
+    catalog = RecipeCatalog(RECIPES_FILE)
+    planner = RecipePlanner(catalog)
+    plan = planner.plan("Wooden Mallet", 2)
+    assert plan["crafts"] == [("Wooden Mallet", 2)]
+    assert plan["raw"] == {"* Branch": 2, "* Log": 2}
+    assert plan["byproducts"] == {}
+
+
+def test_recipe_without_outputs_cannot_supply_a_component(tmp_path):
+    recipes = {"tools": {
+        "Frame": {"components": {"Plank": 2}},
+        "Hut": {"components": {"Frame": 1}, "outputs": [{"item": "Hut", "quantity": 1}]},
+    }}
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps(recipes))
+    plan = RecipePlanner(RecipeCatalog(str(path))).plan("Hut", 1)
+    assert plan["raw"] == {"Frame": 1}
+    assert plan["crafts"] == [("Hut", 1)]
+
+
+def test_missing_adds_requirements_that_share_a_stack():
+    planner = RecipePlanner(RecipeCatalog(RECIPES_FILE))
+    plan = {"raw": {"* Log": 3, "Oak Log": 2}, "tools": ["* Axe"]}
+    inventory = {"items": {"Oak Log": 4, "Pine Log": 10, "Stone Axe": 1}}
+    # "* Log" resolves to the first matching stack, Oak Log, as !craft would.
+    assert planner.missing(plan, inventory) == {"Oak Log": 1}
+
+
+def test_craftable_caps_batches_and_counts_recipes_without_components(tmp_path):
+    recipes = {"tools": {
+        "Stick": {"components": {}, "outputs": [{"item": "Stick", "quantity": 1}]},
+        "Fire": {"components": {"Stick": 2}, "outputs": [{"item": "Fire", "quantity": 1}]},
+    }}
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps(recipes))
+    planner = RecipePlanner(RecipeCatalog(str(path)))
+    craftable = planner.craftable({"items": {"Stick": 20}}, 5)
+    assert [(recipe["name"], batches) for recipe, batches in craftable] == [("Fire", 5), ("Stick", 5)]
+    craftable = planner.craftable({"items": {"Stick": 3}}, 5)
+    assert [(recipe["name"], batches) for recipe, batches in craftable] == [("Fire", 1), ("Stick", 5)]
@@ -0,0 +1,42 @@
+import json
+from utils.simulator import EconomySimulation
+
+SCAVENGE = {"wood": {"Oak Log": {"weight": 100}, "Birch Branch": {"weight": 100}, "Plant Material": {"weight": 50}}}
+RECIPES = {"camp": {
+    "Club": {"components": {"* Log": 2}, "requires": ["*"], "outputs": [{"item": "Club", "quantity": 1}]},
+    "Kindling": {"components": {"* Branch": 3, "* Material": 1}, "outputs": [{"item": "Kindling", "quantity": 2}]},
+    "Campfire": {"components": {"Kindling": 4}, "requires": ["Club"], "outputs": [{"item": "Campfire", "quantity": 1}]},
+}}
+# Phases that require nothing are complete as soon as they start.
+PROJECTS = {"project_types": {"camp": {"phases": [{"required": {}}, {"required": {"Kindling": 20, "labor": 10}},
+                                                  {"required": {}}]}}}
+
+
+class CheckedSimulation(EconomySimulation):
+    """Checks every cached affordability lookup against a fresh one."""
+
+    def _affordable(self, index):
+        affordable = super()._affordable(index)
+        assert affordable == self.planner.craftable(self.inventories[index], 1)
+        return affordable
+
+
+def _options(tmp_path, project_types=PROJECTS):
+    for name, data in (("scavenge", SCAVENGE), ("recipes", RECIPES), ("projects", project_types)):
+        (tmp_path / f"{name}.json").write_text(json.dumps(data))
+    return {"characters": 20, "days": 3, "project": "camp", "seed": 1, "scavenge": str(tmp_path / "scavenge.json"),
+            "recipes": str(tmp_path / "recipes.json"), "projects": str(tmp_path / "projects.json")}
+
+
+def test_cached_affordability_matches_the_planner(tmp_path):
+    stats = CheckedSimulation(_options(tmp_path), seed=1).run()
+    assert stats["crafts"] and stats["disassemblies"]
+    assert stats["projects_completed"]
+
+
+def test_project_of_empty_phases_does_not_loop(tmp_path):
+    options = _options(tmp_path, {"project_types": {"camp": {"phases": [{"required": {}}, {"required": {}}]}}})
+    options["days"] = 0.1
+    stats = EconomySimulation(options, seed=1).run()
+    # Each contribution finishes at most one project.
+    assert stats["projects_completed"] <= stats["scavenges"] + stats["crafts"] + stats["disassemblies"]
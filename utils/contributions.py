@@ -0,0 +1,239 @@
+import os
+import json
+import time
+from bisect import bisect_left, insort
+
+CONTRIBUTION_LEDGER_FILE = "data/contribution_ledger.jsonl"  # One contribution per line, append-only
+
+
+def requirement_lines(project: dict) -> int:
+    """Number of (phase, resource) requirements in a project; each is an equal share of the whole."""
+    return sum(len(phase.get("required", {})) for phase in project.get("phases", []))
+
+
+def credit(project: dict, phase: dict, resource: str, before: int, amount: int) -> float:
+    """
+    Percentage points of the project that `amount` of a resource fills, given `before` already contributed.
+
+    Every requirement line is worth an equal share of 100 points, so labor hours and items are comparable; anything
+    beyond a line's requirement earns nothing.
+    """
+    required = phase.get("required", {}).get(resource, 0)
+    lines = requirement_lines(project)
+    if not required or not lines:
+        return 0.0
+    counted = max(0, min(before + amount, required) - min(before, required))
+    return 100.0 * counted / required / lines
+
+
+def project_progress(project: dict) -> dict:
+    """Compute a project's progress aggregate from its phases, in the same points that credit() awards."""
+    lines = requirement_lines(project)
+    percent = 0.0
+    for phase in project.get("phases", []):
+        for resource, amount in phase.get("required", {}).items():
+            if amount:
+                percent += 100.0 * min(phase.get("contributed", {}).get(resource, 0), amount) / amount / lines
+    return {"percent": percent}
+
+
+def percent_complete(project: dict) -> float:
+    """Percentage of the project's requirements met, read from its progress aggregate."""
+    if project.get("status") == "completed":
+        return 100.0
+    progress = project.get("progress") or project_progress(project)
+    return progress.get("percent", 0.0)
+
+
+def _satisfies(item: str, requirement: str) -> bool:
+    """Whether an item meets a requirement, with the wildcard rules used by !contribute."""
+    base_name = requirement.replace("*", "").strip().lower()
+    name = item.lower()
+    if requirement.startswith("*"):
+        return name.endswith(base_name)
+    if requirement.endswith("*"):
+        return name.startswith(base_name)
+    if "*" in requirement:
+        return base_name in name
+    return name == requirement.lower()
+
+
+def _required(project: dict, target: tuple) -> int:
+    phase_index, resource = target
+    return project["phases"][phase_index].get("required", {}).get(resource, 0)
+
+
+class ContributionLedger:
+    """
+    Append-only log of project contributions plus the running aggregates kept on each project.
+
+    Every contribution is appended to a JSON-lines ledger, and the project dict carries only aggregates: the
+    per-phase "contributed" totals, "contributor_totals" (character -> {resource: units given}),
+    "contributor_credit" (character -> percentage points of the project they filled, see credit()) and
+    "progress". Each project also has an in-memory leaderboard, a sorted list of (-credit, character) built once
+    and kept sorted on every contribution, so the top k contributors are a slice.
+    """
+
+    def __init__(self, ledger_file: str = CONTRIBUTION_LEDGER_FILE):
+        self.ledger_file = ledger_file
+        self._boards = {}  # project id -> sorted [(-credit, character)]
+        self._migrated = None  # ids of projects whose legacy contributions are in the ledger; None until read
+
+    def append(self, entries: list):
+        """Write ledger entries, e.g. ones a record(..., pending=...) call held back until the project was saved."""
+        if not entries:
+            return
+        directory = os.path.dirname(self.ledger_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.ledger_file, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def _entries(self):
+        if not os.path.exists(self.ledger_file):
+            return
+        with open(self.ledger_file, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    print(f"[DEBUG] ContributionLedger: Skipping unreadable ledger line: {e}")
+
+    def _board(self, project: dict) -> list:
+        project_id = str(project["id"])
+        if project_id not in self._boards:
+            self._boards[project_id] = sorted((-points, name) for name, points in project["contributor_credit"].items())
+        return self._boards[project_id]
+
+    def _legacy_entries(self, project: dict, contributors: dict) -> list:
+        """
+        Turn the old per-character contribution lists into ledger entries marked "migrated".
+        The old lists didn't record the phase, so each is matched to the first requirement it fits that isn't
+        already filled by the entries before it (or the last one it fits, if all are).
+        """
+        filled = {}  # (phase index, resource) -> units replayed so far
+        entries = []
+        for name, contributions in contributors.items():
+            for contribution in contributions:
+                item = contribution["item"]
+                target = None
+                for phase_index, phase in enumerate(project.get("phases", [])):
+                    for resource in phase.get("required", {}):
+                        if _satisfies(item, resource):
+                            if target is None or filled.get(target, 0) >= _required(project, target):
+                                target = (phase_index, resource)
+                if target is not None:
+                    filled[target] = filled.get(target, 0) + contribution["amount"]
+                entries.append({"time": None, "project_id": project["id"],
+                                "phase_index": target[0] if target else None, "character": name, "item": item,
+                                "resource": target[1] if target else item, "amount": contribution["amount"],
+                                "migrated": True})
+        return entries
+
+    def _rebuild(self, project: dict):
+        """Recompute a project's contributor aggregates by replaying its ledger entries."""
+        filled = {}  # (phase index, resource) -> units replayed so far
+        totals, credits = {}, {}
+        phases = project.get("phases", [])
+        for entry in self._entries():
+            if str(entry.get("project_id")) != str(project["id"]):
+                continue
+            name, resource, amount = entry["character"], entry.get("resource") or entry["item"], entry["amount"]
+            resource_totals = totals.setdefault(name, {})
+            resource_totals[resource] = resource_totals.get(resource, 0) + amount
+            points = 0.0
+            phase_index = entry.get("phase_index")
+            if phase_index is not None and phase_index < len(phases):
+                before = filled.get((phase_index, resource), 0)
+                filled[(phase_index, resource)] = before + amount
+                points = credit(project, phases[phase_index], resource, before, amount)
+            credits[name] = credits.get(name, 0.0) + points
+        project["contributor_totals"] = totals
+        project["contributor_credit"] = credits
+
+    def migrate(self, project: dict) -> bool:
+        """
+        Bring a project up to the ledger format: move the old per-contribution "contributors" lists into the
+        ledger and add the aggregates. Returns True if the project changed and needs saving.
+
+        Safe to repeat if the project save fails afterwards: migrated entries are marked, and a project whose
+        legacy entries are already in the ledger has its aggregates rebuilt from them instead of appending again.
+        """
+        changed = False
+        project_id = str(project["id"])
+        if "contributors" in project:
+            contributors = project.pop("contributors")
+            if self._migrated is None:
+                self._migrated = {str(e.get("project_id")) for e in self._entries() if e.get("migrated")}
+            if project_id not in self._migrated:
+                self.append(self._legacy_entries(project, contributors))
+                self._migrated.add(project_id)
+            self._rebuild(project)
+            changed = True
+        elif ("contributor_credit" not in project
+              or any(not isinstance(totals, dict) for totals in project.get("contributor_totals", {}).values())):
+            self._rebuild(project)
+            changed = True
+        if "percent" not in project.get("progress", {}):
+            project["progress"] = project_progress(project)
+            changed = True
+        if changed:
+            self._boards.pop(project_id, None)
+        return changed
+
+    def record(self, project: dict, character_name: str, resource: str, amount: int, item: str = None,
+               at: float = None, pending: list = None):
+        """
+        Record a contribution to the project's current phase: append it to the ledger and update the phase total,
+        the contributor's totals and credit, the project's progress and its leaderboard in place. The caller saves
+        the project. With pending, the ledger entry is added to that list instead of written, so the caller can
+        append() it once the project is saved.
+        """
+        self.migrate(project)
+        phase_index = project.get("current_phase_index", 0)
+        phase = project["phases"][phase_index]
+        entry = {"time": time.time() if at is None else at, "project_id": project["id"], "phase_index": phase_index,
+                 "character": character_name, "item": item or resource, "resource": resource, "amount": amount}
+        if pending is not None:
+            pending.append(entry)
+        else:
+            self.append([entry])
+
+        before = phase["contributed"].get(resource, 0)
+        phase["contributed"][resource] = before + amount
+        points = credit(project, phase, resource, before, amount)
+        project["progress"]["percent"] += points
+
+        resource_totals = project["contributor_totals"].setdefault(character_name, {})
+        resource_totals[resource] = resource_totals.get(resource, 0) + amount
+
+        board = self._board(project)
+        credits = project["contributor_credit"]
+        previous = credits.get(character_name)
+        credits[character_name] = (previous or 0.0) + points
+        if previous is not None:
+            position = bisect_left(board, (-previous, character_name))
+            if position == len(board) or board[position] != (-previous, character_name):
+                # Out of step with the stored credit (e.g. an unsaved change); rebuild from it on next use.
+                del self._boards[str(project["id"])]
+                return
+            del board[position]
+        insort(board, (-credits[character_name], character_name))
+
+    def forget(self, project_id):
+        """Drop a project's in-memory leaderboard, e.g. after changes to it were abandoned unsaved."""
+        self._boards.pop(str(project_id), None)
+
+    def leaderboard(self, project: dict, count: int) -> list:
+        """The top contributors of a project as [(character, credit, {resource: units})], most credit first."""
+        self.migrate(project)
+        return [(name, -points, project["contributor_totals"].get(name, {}))
+                for points, name in self._board(project)[:count]]
+
+
+# Shared contribution ledger used by group projects and labor completion.
+ledger = ContributionLedger()
@@ -1,9 +1,22 @@
-import os
-from datetime import datetime
-from utils.json_io import load_json, save_json
+import time
+from datetime import datetime, timezone
+from utils.inventory import load_inventory, save_inventory
+from utils.storage import get_backend
+from utils.scheduler import scheduler
+from utils.item_index import item_index
+from utils.contributions import ledger
 
 PROJECTS_FILE = "data/projects.json"
-ACTIVE_PROJECTS_FILE = "data/active_projects.json"
+COMPLETED_PROJECTS_CHANNEL_ID = 1333893155661021266
+
+# Inventory field holding each timed job type
+JOB_FIELDS = {
+    "crafting": "active_crafting",
+    "scavenge": "active_scavenge",
+    "disassembling": "active_disassembling",
+    "labor": "active_labor",
+}
+LEGACY_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
 def get_next_project_id(projects):
@@ -14,7 +27,7 @@ def get_next_project_id(projects):
 
 def check_phase_completion(project_id, bot):
     """Check if a project phase or project itself is complete."""
-    projects = load_json(ACTIVE_PROJECTS_FILE)
+    projects = get_backend().load_projects()
     project = projects.get(str(project_id))
 
     if not project:
@@ -42,103 +55,132 @@ def check_phase_completion(project_id, bot):
     print(
         f"[DEBUG] Project {project_id} Phase {current_phase_index} - Required: {required}, Contributed: {contributed}")
 
-    # Check if every required resource has been met.
-    phase_complete = all(contributed.get(resource, 0) >= amount for resource, amount in required.items())
-
-    if phase_complete:
-        # If there is another phase, advance to it.
-        if current_phase_index + 1 < len(phases):
-            project["current_phase_index"] += 1
-            print(f"[DEBUG] Project {project_id} advanced to phase {project['current_phase_index']}.")
-        else:
-            # No further phases: mark the project as completed.
-            project["status"] = "completed"
-            print(f"[DEBUG] Project {project_id} is now completed.")
-            channel = bot.get_channel(1333893155661021266)  # COMPLETED_PROJECTS_CHANNEL
-            if channel:
-                bot.loop.create_task(
-                    channel.send(
-                        f"🎉 Project **{project['name']}** (ID: {project_id}) is **COMPLETED**!\nReward: {project['reward']}"
-                    )
-                )
-            else:
-                print(f"[DEBUG] Could not get channel for project completion announcement.")
-    else:
+    if advance_project(project) is None:
         print(f"[DEBUG] Project {project_id} Phase {current_phase_index} requirements not yet met.")
+    elif project["status"] == "completed":
+        announce_completed_projects(bot, [project])
 
-    save_json(ACTIVE_PROJECTS_FILE, projects)
+    get_backend().upsert_project(project)
 
 
-def check_labor_completion(bot):
-    """Process completed labor, update project contributions, and advance/complete project phases."""
-    now = datetime.utcnow()
-    active_projects = load_json(ACTIVE_PROJECTS_FILE)
+def advance_project(project):
+    """
+    Move a project past its current phase if every requirement of that phase is met.
 
-    for filename in os.listdir("data/inventories/"):
-        if not filename.endswith(".json"):
-            continue
+    Returns "advanced" when it moved on to the next phase, "completed" when that was the last phase, or None.
+    """
+    phases = project.get("phases", [])
+    current_phase_index = project.get("current_phase_index", 0)
+    if project.get("status") == "completed" or current_phase_index >= len(phases):
+        return None
+    if not phase_is_complete(phases[current_phase_index]):
+        return None
+    if current_phase_index + 1 < len(phases):
+        project["current_phase_index"] = current_phase_index + 1
+        print(f"[DEBUG] Project {project['id']} advanced to phase {project['current_phase_index']}.")
+        return "advanced"
+    project["status"] = "completed"
+    print(f"[DEBUG] Project {project['id']} is now completed.")
+    return "completed"
+
+
+def announce_completed_projects(bot, projects):
+    """Announce newly completed projects in one message to the completed projects channel."""
+    if not projects:
+        return
+    channel = bot.get_channel(COMPLETED_PROJECTS_CHANNEL_ID)
+    if not channel:
+        print(f"[DEBUG] Could not find the completed projects channel.")
+        return
+    bot.loop.create_task(channel.send("\n".join(
+        f"🎉 Project **{project['name']}** (ID: {project['id']}) is **COMPLETED**!\nReward: {project['reward']}"
+        for project in projects
+    )))
+
+
+def phase_is_complete(phase):
+    """Return True once every resource a project phase requires has been contributed in full."""
+    contributed = phase.get("contributed", {})
+    return all(contributed.get(resource, 0) >= amount for resource, amount in phase.get("required", {}).items())
 
-        character_name = filename[:-5]  # Extract character name from filename
-        inventory = load_json(f"data/inventories/{filename}")
 
+def job_deadline(inventory, job_type):
+    """
+    Return the UTC epoch time at which a character's active job of the given type finishes, or None.
+
+    Deadlines are stored as epoch seconds. Older entries are still understood: "%Y-%m-%d %H:%M:%S" UTC strings
+    (scavenge, labor) are parsed, and event-loop clock values (crafting, disassembling) cannot survive a restart,
+    so they are treated as already due.
+    """
+    active = inventory.get(JOB_FIELDS[job_type])
+    if not active:
+        return None
+    completion_time = active.get("completion_time") if isinstance(active, dict) else active
+    if isinstance(completion_time, str):
+        parsed = datetime.strptime(completion_time, LEGACY_TIME_FORMAT)
+        return parsed.replace(tzinfo=timezone.utc).timestamp()
+    if completion_time is None or completion_time < 1_000_000_000:
+        return 0.0
+    return float(completion_time)
+
+
+def check_labor_completion(bot, character_names):
+    """
+    Process completed labor for the given characters as one batch.
+
+    Due labor is gathered without changing anything, then applied to the in-memory projects; each affected
+    project's phase is evaluated once and the affected projects are written in a single backend call. Only after
+    that are the ledger entries written and each character's labor cleared, so a failure part-way leaves every
+    character's labor in place to be applied again. Completed projects are announced in one message.
+    """
+    now = time.time()
+    due = []  # (character name, inventory, project id, labor amount)
+
+    for character_name in character_names:
+        inventory = load_inventory(character_name)
         if not inventory.get("active_labor"):
             continue
 
         try:
-            completion_time = datetime.strptime(
-                inventory["active_labor"]["completion_time"], "%Y-%m-%d %H:%M:%S"
-            )
+            completion_time = job_deadline(inventory, "labor")
         except ValueError:
-            print(f"[DEBUG] Incorrect datetime format in {filename}.")
+            print(f"[DEBUG] Incorrect datetime format for {character_name}.")
             continue  # Skip if there's a formatting issue
 
-        if now >= completion_time:
-            project_id = str(inventory["active_labor"]["project_id"])
-            labor_amount = inventory["active_labor"]["labor_amount"]
+        if now < completion_time:
+            scheduler.schedule("labor", character_name, completion_time)
+            continue
+
+        due.append((character_name, inventory, str(inventory["active_labor"]["project_id"]),
+                    inventory["active_labor"]["labor_amount"]))
 
+    if not due:
+        return
+    active_projects = get_backend().load_projects()
+    affected = {}  # project id -> project that received labor in this batch
+    entries = []  # ledger entries, written once the projects are saved
+    try:
+        for character_name, _, project_id, labor_amount in due:
             if project_id in active_projects:
                 project = active_projects[project_id]
-                current_phase_index = project.get("current_phase_index", 0)
-                phase = project["phases"][current_phase_index]
-
-                # Update labor contributions
-                phase["contributed"]["labor"] = phase["contributed"].get("labor", 0) + labor_amount
-
-                # Track the character's labor contribution
-                project["contributors"].setdefault(character_name, []).append(
-                    {"item": "labor", "amount": labor_amount}
-                )
-
-                # Check if the current phase's requirements are met
-                required = phase.get("required", {})
-                contributed = phase.get("contributed", {})
-                phase_complete = all(
-                    contributed.get(resource, 0) >= amount for resource, amount in required.items()
-                )
-
-                if phase_complete:
-                    if current_phase_index + 1 < len(project["phases"]):
-                        project["current_phase_index"] += 1
-                        print(f"[DEBUG] Project {project_id} advanced to phase {project['current_phase_index']}.")
-                    else:
-                        project["status"] = "completed"
-                        print(f"[DEBUG] Project {project_id} is now completed.")
-                        channel = bot.get_channel(1333893155661021266)  # COMPLETED_PROJECTS_CHANNEL
-                        if channel:
-                            bot.loop.create_task(
-                                channel.send(
-                                    f"🎉 Project **{project['name']}** (ID: {project_id}) is **COMPLETED**!\nReward: {project['reward']}"
-                                )
-                            )
-                        else:
-                            print(f"[DEBUG] Could not find the completed projects channel.")
-
-            # Reset the active labor for the character
-            inventory["active_labor"] = None
-            save_json(f"data/inventories/{filename}", inventory)
-            save_json(ACTIVE_PROJECTS_FILE, active_projects)
-
-            print(f"[DEBUG] {character_name} completed {labor_amount} hours of labor on project {project_id}.")
+                ledger.record(project, character_name, "labor", labor_amount, pending=entries)
+                affected[project_id] = project
+        completed = [project for project in affected.values() if advance_project(project) == "completed"]
+        if affected:
+            get_backend().upsert_projects(list(affected.values()))
+    except Exception:
+        for project_id in affected:
+            ledger.forget(project_id)
+        raise
+    ledger.append(entries)
+
+    for character_name, inventory, project_id, labor_amount in due:
+        # Reset the active labor for the character
+        inventory["active_labor"] = None
+        save_inventory(character_name, inventory)
+        print(f"[DEBUG] {character_name} completed {labor_amount} hours of labor on project {project_id}.")
+
+    announce_completed_projects(bot, completed)
 
 
 def find_wildcard_match(inventory, required_item):
@@ -146,26 +188,34 @@ def find_wildcard_match(inventory, required_item):
 
     If the required_item contains an asterisk (*), it is treated as a wildcard.
     For example, '* Axe' or 'Axe *' will return the first inventory item whose name contains 'axe'.
+    Lookups go through the inventory's ItemDict prefix/suffix indexes instead of scanning every item.
     """
     if "*" in required_item:
-        base_name = required_item.replace("*", "").strip().lower()
-
-        # If wildcard is at the beginning (before base_name) or the end (after base_name)
-        for item in inventory["items"]:
-            item_lower = item.lower()
-
-            if required_item.startswith("*"):  # Wildcard before the base name
-                if item_lower.endswith(base_name):
-                    return item
-            elif required_item.endswith("*"):  # Wildcard after the base name
-                if item_lower.startswith(base_name):
-                    return item
-            else:  # Wildcard anywhere in the string (before and after)
-                if base_name in item_lower:
-                    return item
+        matches = item_index(inventory).matches(required_item)
+        if matches:
+            return matches[0]
     return required_item  # Return original item if no wildcard or no match
 
 
+def reserve_components(inventory, recipe, batches=1):
+    """
+    Deduct the components for the given number of batches of a recipe, matching wildcards like !craft does.
+
+    Components that resolve to the same stack are added together so it is never counted twice. Returns None once
+    everything is deducted, or the first component the inventory can't cover, in which case nothing is deducted.
+    """
+    matched_components = {}
+    for component, amount in recipe["components"].items():
+        matched_component = find_wildcard_match(inventory, component)
+        matched_components[matched_component] = matched_components.get(matched_component, 0) + amount * batches
+        if inventory["items"].get(matched_component, 0) < matched_components[matched_component]:
+            return component
+
+    for matched_component, amount in matched_components.items():
+        inventory["items"][matched_component] -= amount
+    return None
+
+
 def normalize_components(components):
     """
     Convert components to a dict if it's a list.
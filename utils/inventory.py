@@ -1,5 +1,5 @@
 import os
-import json
+from utils.store import store
 
 INVENTORY_DIR = "data/inventories/"
 
@@ -11,10 +11,15 @@ def get_inventory_file(character_name: str) -> str:
     return file_path
 
 
+def load_character(character_name: str):
+    """Return a character's cached data, or None if the character doesn't exist."""
+    return store.get(character_name)
+
+
 def load_inventory(character_name):
     """Load a character's inventory, initializing it if missing."""
-    inventory_file = get_inventory_file(character_name)
-    if not os.path.exists(inventory_file):
+    data = store.get(character_name)
+    if data is None:
         return {
             "character_name": "",
             "discord_name": "",
@@ -22,25 +27,27 @@ def load_inventory(character_name):
             "total_gold": 0,
             "items": {},
             "active_crafting": None,
+            "crafting_queue": [],
             "active_scavenge": None,
             "active_disassembling": None,
             "active_labor": None,
         }
-    with open(inventory_file, "r") as f:
-        return json.load(f)
+    return data
 
 
 def save_inventory(character_name: str, data: dict):
-    """Save a character's data to its JSON file."""
-    normalized = normalize_character_name(character_name)
-    os.makedirs(INVENTORY_DIR, exist_ok=True)
-    file_path = get_inventory_file(normalized)
-    try:
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=4)
-        print(f"[DEBUG] save_character: Successfully saved '{normalized}' to '{file_path}'")
-    except Exception as e:
-        print(f"[DEBUG] save_character: Error saving '{file_path}' for '{normalized}': {e}")
+    """Save a character's data. The write is deferred until the store's next flush."""
+    store.put(character_name, data)
+
+
+def delete_character(character_name: str) -> bool:
+    """Delete a character from the store and remove its file."""
+    return store.delete(character_name)
+
+
+def iter_characters():
+    """Yield (character_name, data) for every stored character."""
+    return store.characters()
 
 
 def normalize_character_name(name):
@@ -0,0 +1,141 @@
+from bisect import bisect_left, insort
+
+
+class ItemDict(dict):
+    """
+    Item-name -> quantity dict that keeps wildcard lookup indexes up to date as keys are added or removed.
+
+    Alongside the normal dict it maintains a lowercase name map and sorted prefix/suffix indexes, so patterns
+    such as "Axe *", "* Knife" and "*" resolve with a binary search instead of a scan of every item. Quantity
+    changes on existing keys don't touch the indexes. It serializes exactly like a plain dict.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._seq = 0
+        self._order = {}  # item -> insertion sequence, mirrors dict ordering
+        self._lower = {}  # lowercase item -> [items], in insertion order
+        self._prefix = []  # sorted (lowercase item, sequence, item)
+        self._suffix = []  # sorted (reversed lowercase item, sequence, item)
+        self.update(*args, **kwargs)
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    # --- index maintenance ---
+    def _index(self, item):
+        self._seq += 1
+        seq = self._seq
+        lower = item.lower()
+        self._order[item] = seq
+        self._lower.setdefault(lower, []).append(item)
+        insort(self._prefix, (lower, seq, item))
+        insort(self._suffix, (lower[::-1], seq, item))
+
+    def _unindex(self, item):
+        seq = self._order.pop(item)
+        lower = item.lower()
+        names = self._lower[lower]
+        names.remove(item)
+        if not names:
+            del self._lower[lower]
+        for entries, key in ((self._prefix, lower), (self._suffix, lower[::-1])):
+            del entries[bisect_left(entries, (key, seq, item))]
+
+    def __setitem__(self, item, quantity):
+        if item not in self:
+            self._index(item)
+        super().__setitem__(item, quantity)
+
+    def __delitem__(self, item):
+        super().__delitem__(item)
+        self._unindex(item)
+
+    def pop(self, item, *default):
+        if item in self:
+            self._unindex(item)
+        return super().pop(item, *default)
+
+    def popitem(self):
+        item, quantity = super().popitem()
+        self._unindex(item)
+        return item, quantity
+
+    def setdefault(self, item, default=None):
+        if item not in self:
+            self[item] = default
+        return self[item]
+
+    def update(self, *args, **kwargs):
+        for item, quantity in dict(*args, **kwargs).items():
+            self[item] = quantity
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super().clear()
+        self._order.clear()
+        self._lower.clear()
+        self._prefix.clear()
+        self._suffix.clear()
+
+    # --- queries ---
+    @staticmethod
+    def _range(entries, key):
+        start = bisect_left(entries, (key,))
+        matches = []
+        for index in range(start, len(entries)):
+            entry_key, seq, item = entries[index]
+            if not entry_key.startswith(key):
+                break
+            matches.append((seq, item))
+        return matches
+
+    def lookup(self, name: str) -> list:
+        """Return the items whose name equals name, ignoring case."""
+        return list(self._lower.get(name.lower(), []))
+
+    @staticmethod
+    def fits(pattern: str, item: str) -> bool:
+        """Return whether a single item matches a wildcard pattern, with the same rules as matches()."""
+        base_name = pattern.replace("*", "").strip().lower()
+        name = item.lower()
+        if pattern.startswith("*"):
+            return name.endswith(base_name)
+        if pattern.endswith("*"):
+            return name.startswith(base_name)
+        return base_name in name
+
+    def matches(self, pattern: str, rank: str = "order") -> list:
+        """
+        Return every item matching a wildcard pattern, with the same rules as find_wildcard_match.
+
+        "* X" matches names ending in "x", "X *" names starting with "x", and "*" matches everything; a "*" in
+        the middle falls back to a substring check. Results are ranked by insertion order (so the first entry is
+        what find_wildcard_match returns) or, with rank="quantity", by quantity held, largest first.
+        """
+        base_name = pattern.replace("*", "").strip().lower()
+        if not base_name:
+            found = list(enumerate(self))  # A bare "*" matches everything; dict order is insertion order
+        elif pattern.startswith("*"):
+            found = self._range(self._suffix, base_name[::-1])
+        elif pattern.endswith("*"):
+            found = self._range(self._prefix, base_name)
+        else:
+            found = [(self._order[item], item) for item in self if base_name in item.lower()]
+        found.sort()
+        items = [item for _, item in found]
+        if rank == "quantity":
+            items.sort(key=lambda item: self[item], reverse=True)
+        return items
+
+
+def item_index(inventory: dict) -> ItemDict:
+    """Return the inventory's items as an ItemDict, converting a plain dict in place the first time."""
+    items = inventory.get("items")
+    if not isinstance(items, ItemDict):
+        items = ItemDict(items or {})
+        inventory["items"] = items
+    return items
@@ -0,0 +1,182 @@
+import os
+import json
+import random
+from datetime import timedelta
+from utils.json_io import SCAVENGE_FILE
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batch resolution falls back to the pure-Python sampler
+    np = None
+
+SCAVENGE_DURATION = timedelta(minutes=60)  # 1-hour scavenging process
+
+# Scavenging roll settings
+GENERAL_ROLL_COUNT = 10  # Number of rolls for general scavenging
+SPECIFIC_ROLL_COUNT = 5  # Number of rolls for specific scavenging
+ROLL_CHANCE = 0.4  # Chance per roll to find an item
+
+
+class AliasTable:
+    """
+    Weighted item picker built with Vose's alias method.
+
+    Building the table is O(n); every draw afterwards is O(1): one uniform column pick and one biased coin flip,
+    instead of the cumulative-weight pass random.choices does on each call.
+    """
+
+    def __init__(self, items: list, weights: list):
+        self.items = list(items)
+        count = len(self.items)
+        self.prob = [1.0] * count
+        self.alias = list(range(count))
+        self._arrays = None  # (prob, alias) as NumPy arrays, built on first vectorized draw
+        total = float(sum(weights))
+        if count == 0 or total <= 0:
+            return
+
+        scaled = [weight * count / total for weight in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1.0 up to rounding error.
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def __len__(self):
+        return len(self.items)
+
+    def sample(self, rng=random):
+        """Draw one item."""
+        column = int(rng.random() * len(self.items))
+        return self.items[column] if rng.random() < self.prob[column] else self.items[self.alias[column]]
+
+    def sample_many(self, k: int, rng=random) -> list:
+        """Draw k items with replacement."""
+        items, prob, alias, count = self.items, self.prob, self.alias, len(self.items)
+        draws = []
+        for _ in range(k):
+            column = int(rng.random() * count)
+            draws.append(items[column] if rng.random() < prob[column] else items[alias[column]])
+        return draws
+
+    def arrays(self):
+        """Return (prob, alias) as NumPy arrays for vectorized draws."""
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.prob, dtype=float), np.asarray(self.alias, dtype=np.intp))
+        return self._arrays
+
+
+class LootTables:
+    """
+    Compiled view of data/scavenge.json: one alias table per resource group plus a general table over every item.
+
+    The general table matches the old flattened lookup, so when two groups list the same item the later group's
+    weight wins. Tables are rebuilt only when the file's modification time changes.
+    """
+
+    def __init__(self, scavenge_file: str = SCAVENGE_FILE):
+        self.scavenge_file = scavenge_file
+        self.version = None  # mtime of the loaded file
+        self.groups = {}  # resource type -> AliasTable
+        self.general = AliasTable([], [])
+
+    def _build(self, raw: dict):
+        groups, flat = {}, {}
+        for resource_type, group in raw.items():
+            groups[resource_type] = AliasTable(list(group), [entry["weight"] for entry in group.values()])
+            flat.update(group)
+        self.groups = groups
+        self.general = AliasTable(list(flat), [entry["weight"] for entry in flat.values()])
+
+    def refresh(self):
+        """Recompile the tables if the loot file changed since the last load."""
+        try:
+            mtime = os.path.getmtime(self.scavenge_file)
+        except OSError:
+            if self.version is not None:
+                self.groups, self.general, self.version = {}, AliasTable([], []), None
+            return
+        if mtime == self.version:
+            return
+        try:
+            with open(self.scavenge_file, "r") as f:
+                raw = json.load(f)
+        except Exception as e:
+            print(f"[DEBUG] LootTables: Error reading '{self.scavenge_file}', keeping previous tables: {e}")
+            return
+        self._build(raw)
+        self.version = mtime
+        print(f"[DEBUG] LootTables: Compiled {len(self.groups)} loot group(s), {len(self.general)} item(s) in total.")
+
+    def table(self, resource_type: str = None) -> AliasTable:
+        """Return the table for a resource group, or the general table if the group is unknown or not given."""
+        self.refresh()
+        if resource_type and resource_type in self.groups:
+            return self.groups[resource_type]
+        return self.general
+
+    def resolve(self, jobs, rng=None) -> dict:
+        """
+        Roll the loot for many finished scavenges at once.
+
+        jobs is an iterable of (character_name, resource_type) pairs, resource_type being None for general
+        scavenging. Returns {character_name: {item: count}} with an entry for every job, empty if nothing was found.
+        Jobs are grouped by loot table and roll count, and each group's success flags and item picks are drawn in
+        one pass. rng is a numpy.random.Generator (a random.Random when NumPy isn't installed); pass a seeded one
+        from make_rng() to make a resolution reproducible.
+        """
+        rng = make_rng() if rng is None else rng
+        self.refresh()
+        batches = {}  # (table key, roll count) -> [character names]
+        results = {}
+        for character_name, resource_type in jobs:
+            key = resource_type if resource_type in self.groups else None
+            roll_count = SPECIFIC_ROLL_COUNT if resource_type else GENERAL_ROLL_COUNT
+            batches.setdefault((key, roll_count), []).append(character_name)
+            results[character_name] = {}
+
+        for (key, roll_count), names in batches.items():
+            table = self.groups[key] if key is not None else self.general
+            if not len(table):
+                continue
+            if np is not None and isinstance(rng, np.random.Generator):
+                self._resolve_numpy(table, names, roll_count, rng, results)
+            else:
+                for character_name in names:
+                    successes = sum(rng.random() < ROLL_CHANCE for _ in range(roll_count))
+                    found = results[character_name]
+                    for item in table.sample_many(successes, rng):
+                        found[item] = found.get(item, 0) + 1
+        return results
+
+    @staticmethod
+    def _resolve_numpy(table, names, roll_count, rng, results):
+        prob, alias = table.arrays()
+        successes = (rng.random((len(names), roll_count)) < ROLL_CHANCE).sum(axis=1)
+        total = int(successes.sum())
+        if total == 0:
+            return
+        columns = rng.integers(0, len(table), size=total)
+        picks = np.where(rng.random(total) < prob[columns], columns, alias[columns])
+        owners = np.repeat(np.arange(len(names)), successes)
+        pairs, counts = np.unique(owners * len(table) + picks, return_counts=True)
+        for pair, count in zip(pairs.tolist(), counts.tolist()):
+            owner, pick = divmod(pair, len(table))
+            results[names[owner]][table.items[pick]] = count
+
+
+def make_rng(seed=None):
+    """Return the random generator resolve() expects: a NumPy Generator if available, else random.Random."""
+    if np is not None:
+        return np.random.default_rng(seed)
+    return random.Random(seed)
+
+
+# Shared loot tables used by scavenging.
+loot_tables = LootTables()
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+
+TRADE_HISTORY_FILE = "data/trade_history.jsonl"  # One settled trade per line, append-only
+MARKET_SNAPSHOT_FILE = "data/market_snapshot.json"  # Aggregates as of a byte offset into the history
+SNAPSHOT_EVERY = 200  # Trades recorded (or replayed) between snapshots
+BUCKETS = {"hour": 3600}  # Aggregation granularity -> bucket width in seconds
+BUCKETS_KEPT = {"hour": 48}  # How many of the most recent buckets are kept per item
+WINDOWS = {"hour": 3600, "day": 86400}  # Rolling stats reported by stats() -> trailing seconds they cover
+
+
+def _new_bucket():
+    return {"min": None, "max": None, "gold": 0, "quantity": 0, "volume": 0, "trades": 0}
+
+
+class Market:
+    """
+    Trade history and per-item price aggregates.
+
+    Every settled trade is appended to a JSON-lines log. Aggregates are updated incrementally as trades are
+    recorded, so queries never scan the history. Prices are in gold per unit and only come from trades where
+    one side is Gold; barter trades still count towards volume. Each item keeps its last price, all-time volume
+    and hourly buckets with min, max and VWAP, which are merged into trailing hour and day stats when queried.
+
+    The history itself is kept in full and keeps growing. To keep startup cheap, the aggregates are snapshotted
+    every SNAPSHOT_EVERY trades together with the log's size at that point, and startup loads the snapshot and
+    replays only the lines written after it.
+    """
+
+    def __init__(self, history_file: str = TRADE_HISTORY_FILE, snapshot_file: str = MARKET_SNAPSHOT_FILE):
+        self.history_file = history_file
+        self.snapshot_file = snapshot_file
+        self._items = None  # lowercase item -> aggregates; None until loaded
+        self._unsnapshotted = 0  # Trades applied since the last snapshot
+
+    def _load(self):
+        if self._items is not None:
+            return
+        self._items = {}
+        offset = self._load_snapshot()
+        if not os.path.exists(self.history_file):
+            return
+        count = 0
+        with open(self.history_file, "r") as f:
+            f.seek(offset)
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._apply(json.loads(line))
+                    count += 1
+                except (ValueError, KeyError) as e:
+                    print(f"[DEBUG] Market: Skipping unreadable history line: {e}")
+        print(f"[DEBUG] Market: Replayed {count} trade(s) after byte {offset} for {len(self._items)} item(s).")
+        self._unsnapshotted = count
+        if self._unsnapshotted >= SNAPSHOT_EVERY:
+            self._save_snapshot()
+
+    def _load_snapshot(self) -> int:
+        """Load the aggregates from the snapshot and return the history offset to replay from (0 if none)."""
+        try:
+            with open(self.snapshot_file, "r") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        offset = snapshot.get("offset", 0)
+        size = os.path.getsize(self.history_file) if os.path.exists(self.history_file) else 0
+        if offset > size:
+            print(f"[DEBUG] Market: Snapshot is ahead of the history; rebuilding from the full log.")
+            return 0
+        for key, stats in snapshot.get("items", {}).items():
+            # JSON object keys are strings; bucket starts are epoch seconds. Granularities no longer kept are dropped.
+            stats["buckets"] = {granularity: {int(start): bucket
+                                              for start, bucket in stats["buckets"].get(granularity, {}).items()}
+                                for granularity in BUCKETS}
+            self._items[key] = stats
+        return offset
+
+    def _save_snapshot(self):
+        directory = os.path.dirname(self.snapshot_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        offset = os.path.getsize(self.history_file) if os.path.exists(self.history_file) else 0
+        temp_path = self.snapshot_file + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"offset": offset, "items": self._items}, f, separators=(",", ":"))
+        os.replace(temp_path, self.snapshot_file)
+        self._unsnapshotted = 0
+
+    def _item(self, name: str) -> dict:
+        key = name.strip().lower()
+        if key not in self._items:
+            self._items[key] = {"name": name, "last_price": None, "last_time": None, "volume": 0, "trades": 0,
+                                "buckets": {granularity: {} for granularity in BUCKETS}}
+        return self._items[key]
+
+    def _apply(self, entry: dict):
+        at = entry["time"]
+        sides = ((entry["offer_item"], entry["offer_amount"], entry["request_item"], entry["request_amount"]),
+                 (entry["request_item"], entry["request_amount"], entry["offer_item"], entry["offer_amount"]))
+        for item, quantity, other_item, other_quantity in sides:
+            if item.lower() == "gold":
+                continue
+            price = other_quantity / quantity if other_item.lower() == "gold" and quantity else None
+            stats = self._item(item)
+            stats["volume"] += quantity
+            stats["trades"] += 1
+            if price is not None:
+                stats["last_price"] = price
+                stats["last_time"] = at
+            for granularity, width in BUCKETS.items():
+                buckets = stats["buckets"][granularity]
+                start = int(at // width * width)
+                bucket = buckets.get(start)
+                if bucket is None:
+                    bucket = buckets[start] = _new_bucket()
+                    while len(buckets) > BUCKETS_KEPT[granularity]:
+                        del buckets[min(buckets)]
+                bucket["volume"] += quantity
+                bucket["trades"] += 1
+                if price is not None:
+                    bucket["min"] = price if bucket["min"] is None else min(bucket["min"], price)
+                    bucket["max"] = price if bucket["max"] is None else max(bucket["max"], price)
+                    bucket["gold"] += other_quantity
+                    bucket["quantity"] += quantity
+
+    def record(self, trade: dict, acceptor: str, at: float = None):
+        """Append a settled trade to the history and fold it into the aggregates."""
+        self._load()
+        entry = {
+            "time": time.time() if at is None else at,
+            "id": trade["id"],
+            "seller": trade["character"],
+            "buyer": acceptor,
+            "offer_item": trade["offer_item"],
+            "offer_amount": trade["offer_amount"],
+            "request_item": trade["request_item"],
+            "request_amount": trade["request_amount"],
+        }
+        directory = os.path.dirname(self.history_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.history_file, "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._apply(entry)
+        self._unsnapshotted += 1
+        if self._unsnapshotted >= SNAPSHOT_EVERY:
+            self._save_snapshot()
+
+    def stats(self, item: str, now: float = None):
+        """
+        Return the aggregates for an item, or None if it was never traded.
+
+        The result has name, last_price, last_time, volume and trades, plus rolling "hour" and "day" entries for
+        the trailing 60 minutes and 24 hours (start, min, max, vwap, volume, trades), each None if nothing traded
+        in that time. They merge every hourly bucket the window touches, so "start" is the start of the oldest
+        one and a window can reach back up to an hour further than its length.
+        """
+        self._load()
+        stats = self._items.get(item.strip().lower())
+        if stats is None:
+            return None
+        now = time.time() if now is None else now
+        result = {key: stats[key] for key in ("name", "last_price", "last_time", "volume", "trades")}
+        buckets = stats["buckets"]["hour"]
+        for window, span in WINDOWS.items():
+            merged = [(start, bucket) for start, bucket in buckets.items()
+                      if now - span < start + BUCKETS["hour"] and start <= now]
+            if not merged:
+                result[window] = None
+                continue
+            prices = [bucket for _, bucket in merged if bucket["min"] is not None]
+            gold = sum(bucket["gold"] for _, bucket in merged)
+            quantity = sum(bucket["quantity"] for _, bucket in merged)
+            result[window] = {
+                "start": min(start for start, _ in merged),
+                "min": min((bucket["min"] for bucket in prices), default=None),
+                "max": max((bucket["max"] for bucket in prices), default=None),
+                "vwap": gold / quantity if quantity else None,
+                "volume": sum(bucket["volume"] for _, bucket in merged),
+                "trades": sum(bucket["trades"] for _, bucket in merged),
+            }
+        return result
+
+    def price(self, item: str):
+        """Best current gold value of one unit: the VWAP over the last 24 hours, else the last price, else None."""
+        stats = self.stats(item)
+        if stats is None:
+            return None
+        if stats["day"] is not None and stats["day"]["vwap"] is not None:
+            return stats["day"]["vwap"]
+        return stats["last_price"]
+
+
+# Shared market used by trading and donations.
+market = Market()
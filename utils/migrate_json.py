@@ -0,0 +1,65 @@
+"""
+One-shot importer that copies the JSON data tree into the SQLite backend.
+
+Usage: python -m utils.migrate_json [--data-dir data] [--db data/bot.db]
+
+After a successful import, set "STORAGE_BACKEND": "sqlite" in config.json and restart the bot.
+The JSON files are left untouched so they can still be used as a fallback.
+"""
+import argparse
+from utils.storage import JsonBackend, SqliteBackend, DATA_DIR, DATABASE_FILE
+
+
+def migrate(data_dir: str = DATA_DIR, db_path: str = DATABASE_FILE) -> dict:
+    """Import every character, trade, project, availability entry, overlap and donation. Returns row counts."""
+    source = JsonBackend(data_dir)
+    target = SqliteBackend(db_path)
+    try:
+        characters = {}
+        for name in source.character_names():
+            data = source.load_character(name)
+            if data is not None:
+                characters[name] = data
+        target.save_characters(characters)
+
+        trades = source.load_trades()
+        target.save_trades(trades)
+
+        projects = source.load_projects()
+        target.save_projects(projects)
+
+        availability = source.load_availability()
+        target.save_availability(availability)
+
+        overlaps = source.load_overlaps()
+        target.save_overlaps(overlaps)
+
+        donations = source.load_donations()
+        target.save_donations(donations)
+    finally:
+        target.close()
+
+    return {
+        "characters": len(characters),
+        "trades": len(trades),
+        "projects": len(projects),
+        "availability": len(availability),
+        "overlaps": len(overlaps),
+        "donations": len(donations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the JSON data tree into SQLite.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory holding the JSON data files.")
+    parser.add_argument("--db", default=DATABASE_FILE, help="Path of the SQLite database to create or update.")
+    args = parser.parse_args()
+
+    counts = migrate(args.data_dir, args.db)
+    for table, count in counts.items():
+        print(f"✅ Imported {count} {table}")
+    print(f'Set "STORAGE_BACKEND": "sqlite" in config.json to switch the bot over to {args.db}.')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+import os
+import json
+import time
+import random
+from datetime import datetime, timezone
+
+MIN_PLAYERS = 2  # Smallest group worth announcing
+BEST_WINDOW_COUNT = 5  # Windows returned by a "best session time" query
+ARCHIVE_FILE = "data/availability_archive.jsonl"  # Ended entries and windows, one JSON object per line
+LEGACY_TIME_FORMAT = "%Y-%m-%d %H:%M"  # UTC strings used before times were stored as epoch minutes
+WEEK_MINUTES = 7 * 24 * 60
+HORIZON_MINUTES = 14 * 24 * 60  # How far ahead recurring availability is expanded into concrete entries
+
+
+def now_minutes() -> int:
+    """Current UTC time in epoch minutes."""
+    return int(time.time() // 60)
+
+
+def to_minutes(value) -> int:
+    """Convert a stored time (epoch minutes, or a legacy "%Y-%m-%d %H:%M" UTC string) to epoch minutes."""
+    if isinstance(value, str):
+        parsed = datetime.strptime(value, LEGACY_TIME_FORMAT).replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp() // 60)
+    return int(value)
+
+
+def minutes_to_datetime(minutes: int, tz=timezone.utc) -> datetime:
+    return datetime.fromtimestamp(minutes * 60, timezone.utc).astimezone(tz)
+
+
+def migrate_times(records: list) -> bool:
+    """Convert start/end (and window keys) of entries or overlaps to epoch minutes in place. True if any changed."""
+    changed = False
+    for record in records:
+        if isinstance(record["start"], str) or isinstance(record["end"], str):
+            record["start"], record["end"] = to_minutes(record["start"]), to_minutes(record["end"])
+            if "key" in record or "message_id" in record:
+                record["key"] = window_key(record["start"], record["end"])
+            changed = True
+    return changed
+
+
+def archive(kind: str, records: list, archive_file: str = ARCHIVE_FILE):
+    """Append ended records to the archive log so they can leave the hot set."""
+    if not records:
+        return
+    directory = os.path.dirname(archive_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(archive_file, "a") as f:
+        for record in records:
+            f.write(json.dumps({"kind": kind, **record}, separators=(",", ":")) + "\n")
+
+
+def is_rule(record: dict) -> bool:
+    """True for a stored recurring availability rule rather than a one-off entry."""
+    return record.get("recurrence") == "weekly"
+
+
+def occurrences(rule: dict, after: int, before: int):
+    """
+    Lazily yield the concrete entries of a weekly rule that end after `after` and start before `before`.
+
+    A rule stores its first occurrence as start/end in epoch minutes; occurrence k is shifted by k weeks. Each
+    occurrence is an ordinary availability entry with a deterministic ID ("<rule id>@<start>") and a rule_id.
+    """
+    week = max(0, (after - rule["end"]) // WEEK_MINUTES + 1)
+    while True:
+        start = rule["start"] + week * WEEK_MINUTES
+        if start >= before:
+            return
+        yield {
+            "id": f"{rule['id']}@{start}",
+            "rule_id": rule["id"],
+            "discord_name": rule["discord_name"],
+            "user_id": rule["user_id"],
+            "start": start,
+            "end": rule["end"] + week * WEEK_MINUTES,
+        }
+        week += 1
+
+
+def window_key(start, end) -> str:
+    """Key under which a window is stored in the overlaps file."""
+    return f"{start}_{end}"
+
+
+def sweep_windows(entries, min_players: int = MIN_PLAYERS) -> list:
+    """
+    Find every window in which at least min_players distinct players are available at once.
+
+    entries are availability dicts with "user_id", "start" and "end" (any mutually comparable values). The endpoints
+    are sorted once and swept left to right while a per-player counter tracks who is available, so the cost is
+    O(n log n) plus the size of the output. Between two consecutive endpoints the set of players is constant; each
+    such segment with enough players becomes a window, and touching segments with the same players are merged, so
+    every window is maximal. Returns [(start, end, frozenset of user ids)] in time order.
+    """
+    events = []
+    for entry in entries:
+        if entry["start"] < entry["end"]:
+            events.append((entry["start"], 1, entry["user_id"]))
+            events.append((entry["end"], -1, entry["user_id"]))
+    events.sort(key=lambda event: (event[0], event[1]))  # Ends before starts at the same instant
+
+    windows = []
+    active = {}  # user id -> number of their intervals covering the sweep position
+    index = 0
+    while index < len(events):
+        position = events[index][0]
+        while index < len(events) and events[index][0] == position:
+            _, delta, user_id = events[index]
+            count = active.get(user_id, 0) + delta
+            if count:
+                active[user_id] = count
+            else:
+                del active[user_id]
+            index += 1
+        if index == len(events) or len(active) < min_players:
+            continue
+        players = frozenset(active)
+        next_position = events[index][0]
+        if windows and windows[-1][1] == position and windows[-1][2] == players:
+            windows[-1] = (windows[-1][0], next_position, players)
+        else:
+            windows.append((position, next_position, players))
+    return windows
+
+
+class _Node:
+    __slots__ = ("key", "entry", "priority", "left", "right", "max_end")
+
+    def __init__(self, entry):
+        self.key = (entry["start"], entry["id"])
+        self.entry = entry
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.max_end = entry["end"]
+
+
+def _update(node):
+    node.max_end = node.entry["end"]
+    for child in (node.left, node.right):
+        if child is not None and child.max_end > node.max_end:
+            node.max_end = child.max_end
+
+
+class IntervalTree:
+    """
+    Treap of availability entries ordered by start, where every node also tracks the latest end in its subtree.
+
+    Insert and remove are O(log n) expected. overlapping() skips any subtree whose latest end is before the query
+    start and any right subtree starting after the query end, so it costs O(log n + k) for k results.
+    """
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _rotate_right(node):
+        left = node.left
+        node.left, left.right = left.right, node
+        _update(node)
+        _update(left)
+        return left
+
+    @staticmethod
+    def _rotate_left(node):
+        right = node.right
+        node.right, right.left = right.left, node
+        _update(node)
+        _update(right)
+        return right
+
+    def insert(self, entry: dict):
+        self._root = self._insert(self._root, _Node(entry))
+        self._size += 1
+
+    def _insert(self, node, new):
+        if node is None:
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                return self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                return self._rotate_left(node)
+        _update(node)
+        return node
+
+    def remove(self, entry: dict):
+        self._root, removed = self._remove(self._root, (entry["start"], entry["id"]))
+        if removed:
+            self._size -= 1
+        return removed
+
+    def _remove(self, node, key):
+        if node is None:
+            return None, False
+        if key < node.key:
+            node.left, removed = self._remove(node.left, key)
+        elif key > node.key:
+            node.right, removed = self._remove(node.right, key)
+        else:
+            if node.left is None:
+                return node.right, True
+            if node.right is None:
+                return node.left, True
+            # Rotate the higher-priority child up and keep sinking the node until it has one child.
+            if node.left.priority > node.right.priority:
+                node = self._rotate_right(node)
+                node.right, removed = self._remove(node.right, key)
+            else:
+                node = self._rotate_left(node)
+                node.left, removed = self._remove(node.left, key)
+        _update(node)
+        return node, removed
+
+    def ending_before(self, moment) -> list:
+        """Every entry whose end is at or before moment, skipping subtrees that all end later."""
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if node.entry["end"] <= moment:
+                found.append(node.entry)
+            # A subtree can only hold ended entries if some entry in it starts before moment.
+            stack.append(node.left)
+            if node.key[0] < moment:
+                stack.append(node.right)
+        return found
+
+    def overlapping(self, start, end) -> list:
+        """Every entry with entry start < end and start < entry end."""
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            if node.key[0] < end:
+                if start < node.entry["end"]:
+                    found.append(node.entry)
+                stack.append(node.right)
+        return found
+
+
+class OverlapIndex:
+    """
+    Live set of availability entries and the overlap windows they produce.
+
+    Adding or removing an entry only recomputes the connected group of intervals around it (found through the
+    interval tree by widening the query until no new interval joins), and reports which windows appeared, changed
+    players or disappeared. Windows are overlap dicts ({"key", "start", "end", "user_ids", "message_id"}) keyed
+    by window_key(); version increases on every change so callers can memoize derived results.
+
+    Weekly rules are kept apart from the entries and only their occurrences up to `horizon` are in the tree;
+    extend() moves the horizon forward as time passes.
+    """
+
+    def __init__(self, min_players: int = MIN_PLAYERS):
+        self.min_players = min_players
+        self.tree = IntervalTree()
+        self.entries = {}  # entry id -> entry, including expanded rule occurrences
+        self.rules = {}  # rule id -> weekly rule
+        self.horizon = None  # Rule occurrences starting before this epoch minute are expanded
+        self.windows = {}  # window key -> overlap dict
+        self.version = 0
+        self._best = {}  # (version, min_players) -> sweep_windows() output
+
+    def load(self, entries, overlaps, now: int = None):
+        """Rebuild from stored entries and rules, keeping what was already announced for windows that still exist."""
+        now = now_minutes() if now is None else now
+        self.tree = IntervalTree()
+        self.entries = {}
+        self.rules = {}
+        self.horizon = now + HORIZON_MINUTES
+        for entry in entries:
+            if is_rule(entry):
+                self.rules[entry["id"]] = entry
+                for occurrence in occurrences(entry, now, self.horizon):
+                    self._insert(occurrence)
+            else:
+                self._insert(entry)
+        known = {o.get("key") or window_key(o["start"], o["end"]): o for o in overlaps}
+        self.windows = {}
+        for start, end, players in sweep_windows(self.entries.values(), self.min_players):
+            key = window_key(start, end)
+            window = known.get(key) or {"key": key, "start": start, "end": end, "message_id": None}
+            window["key"] = key
+            window["user_ids"] = sorted(players, key=str)
+            self.windows[key] = window
+        self.version += 1
+
+    def _component(self, start, end):
+        """Widen [start, end) until it covers every interval transitively overlapping it."""
+        while True:
+            found = self.tree.overlapping(start, end)
+            low = min([start] + [entry["start"] for entry in found])
+            high = max([end] + [entry["end"] for entry in found])
+            if (low, high) == (start, end):
+                return start, end, found
+            start, end = low, high
+
+    def _refresh(self, start, end):
+        low, high, found = self._component(start, end)
+        old = {key: window for key, window in self.windows.items() if window["start"] < high and low < window["end"]}
+        added, changed = [], []
+        for window_start, window_end, players in sweep_windows(found, self.min_players):
+            key = window_key(window_start, window_end)
+            user_ids = sorted(players, key=str)
+            window = old.pop(key, None)
+            if window is None:
+                window = {"key": key, "start": window_start, "end": window_end, "user_ids": user_ids,
+                          "message_id": None}
+                self.windows[key] = window
+                added.append(window)
+            elif window["user_ids"] != user_ids:
+                window["user_ids"] = user_ids
+                changed.append(window)
+        for key in old:
+            del self.windows[key]
+        self.version += 1
+        return added, changed, list(old.values())
+
+    def _insert(self, entry: dict) -> bool:
+        if entry["id"] in self.entries:
+            return False
+        self.entries[entry["id"]] = entry
+        self.tree.insert(entry)
+        return True
+
+    def _refresh_all(self, entries) -> tuple:
+        """Refresh the span covering the given entries in one pass. Returns (added, changed, removed) windows."""
+        if not entries:
+            return [], [], []
+        return self._refresh(min(entry["start"] for entry in entries), max(entry["end"] for entry in entries))
+
+    def add(self, entry: dict):
+        """Add an entry. Returns (added, changed, removed) windows."""
+        self._insert(entry)
+        return self._refresh(entry["start"], entry["end"])
+
+    def add_rule(self, rule: dict, now: int = None):
+        """Add a weekly rule and expand its occurrences up to the horizon. Returns (added, changed, removed)."""
+        now = now_minutes() if now is None else now
+        if self.horizon is None:
+            self.horizon = now + HORIZON_MINUTES
+        self.rules[rule["id"]] = rule
+        return self._refresh_all([o for o in occurrences(rule, now, self.horizon) if self._insert(o)])
+
+    def remove_rule(self, rule_id: str):
+        """Remove a weekly rule and its expanded occurrences. Returns (added, changed, removed), or None if unknown."""
+        if self.rules.pop(rule_id, None) is None:
+            return None
+        removed = [entry for entry in self.entries.values() if entry.get("rule_id") == rule_id]
+        for entry in removed:
+            del self.entries[entry["id"]]
+            self.tree.remove(entry)
+        return self._refresh_all(removed)
+
+    def extend(self, now: int = None):
+        """Move the horizon to now + HORIZON_MINUTES, expanding the rule occurrences that come into range."""
+        now = now_minutes() if now is None else now
+        horizon = now + HORIZON_MINUTES
+        if self.horizon is not None and horizon <= self.horizon:
+            return [], [], []
+        previous = now if self.horizon is None else self.horizon
+        self.horizon = horizon
+        new = [occurrence for rule in self.rules.values() for occurrence in occurrences(rule, previous, horizon)
+               if self._insert(occurrence)]
+        return self._refresh_all(new)
+
+    def stored(self) -> list:
+        """What belongs in storage: one-off entries and rules, but not the expanded occurrences."""
+        return [entry for entry in self.entries.values() if "rule_id" not in entry] + list(self.rules.values())
+
+    def remove(self, entry_id: str):
+        """Remove an entry by ID. Returns (added, changed, removed) windows, or None if the entry is unknown."""
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return None
+        self.tree.remove(entry)
+        return self._refresh(entry["start"], entry["end"])
+
+    def expire(self, now):
+        """
+        Drop every entry and window that has ended by now. Returns (ended one-off entries, ended windows).
+
+        An ended entry can't contribute to any future window, so removing it leaves the live windows unchanged and
+        keeps the index proportional to upcoming availability. Ended rule occurrences are dropped too, but aren't
+        returned since they were never stored.
+        """
+        ended_entries = self.tree.ending_before(now)
+        for entry in ended_entries:
+            self.tree.remove(entry)
+            del self.entries[entry["id"]]
+        ended_windows = [window for window in self.windows.values() if window["end"] <= now]
+        for window in ended_windows:
+            del self.windows[window["key"]]
+        if ended_entries or ended_windows:
+            self.version += 1
+        return [entry for entry in ended_entries if "rule_id" not in entry], ended_windows
+
+    def best_windows(self, min_players: int = MIN_PLAYERS, min_minutes: int = 0, now: int = None,
+                     count: int = BEST_WINDOW_COUNT) -> list:
+        """
+        Return the top windows for scheduling a session: [(start, end, frozenset of user ids)].
+
+        Windows come from one sweep over every live entry with the given player threshold. Windows already under
+        way are clipped to start at now, those left with less than min_minutes are dropped, and the rest are ranked
+        by number of players, then remaining duration, then earliest start. The sweep is memoized until the entry
+        set changes; clipping and ranking depend on now and are redone per query.
+        """
+        now = now_minutes() if now is None else now
+        memo_key = (self.version, min_players)
+        if memo_key not in self._best:
+            self._best = {key: value for key, value in self._best.items() if key[0] == self.version}
+            self._best[memo_key] = sweep_windows(self.entries.values(), max(min_players, 1))
+        windows = []
+        for start, end, players in self._best[memo_key]:
+            start = max(start, now)
+            if end - start >= max(min_minutes, 1):
+                windows.append((start, end, players))
+        windows.sort(key=lambda window: (-len(window[2]), -(window[1] - window[0]), window[0]))
+        return windows[:count]
+
+    def overlaps(self) -> list:
+        """Current windows in time order, ready to be stored."""
+        return sorted(self.windows.values(), key=lambda window: (window["start"], window["end"]))
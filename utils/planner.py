@@ -0,0 +1,152 @@
+import math
+from utils.recipes import catalog
+from utils.functions import find_wildcard_match
+from utils.item_index import item_index
+
+
+class RecipeCycleError(ValueError):
+    """Raised when recipes depend on each other in a loop."""
+
+
+class RecipePlanner:
+    """
+    Bill-of-materials expander over the recipe graph.
+
+    plan(item, qty) walks recipes down to raw components (items with no recipe, and wildcard requirements)
+    and returns the raw totals, the intermediate crafts in the order they must happen, the tools involved,
+    any by-products and the total crafting time. Sub-plans are memoized per (item, qty) and the whole cache is
+    dropped whenever the recipe catalog reloads.
+    """
+
+    def __init__(self, recipe_catalog=catalog):
+        self.catalog = recipe_catalog
+        self._cache = {}
+        self._version = None
+
+    def _recipe_for(self, item, root):
+        if "*" in item:
+            return None  # Wildcards are satisfied by whatever matching raw item the character has
+        recipes = self.catalog.producing(item)
+        if recipes:
+            return recipes[0]
+        # A recipe without "outputs" delivers nothing, so it can't supply a component; it's only planned when it is
+        # the item asked for, found by name as !craft does.
+        return self.catalog.get(item) if root else None
+
+    def plan(self, item: str, qty: int = 1) -> dict:
+        self.catalog.refresh()
+        if self._version != self.catalog.version:
+            self._cache.clear()
+            self._version = self.catalog.version
+        return self._expand(item, qty, ())
+
+    def _expand(self, item, qty, stack):
+        root = not stack
+        key = (item.lower(), qty, root)
+        if key in self._cache:
+            return self._cache[key]
+        if item.lower() in stack:
+            path = " → ".join(stack + (item.lower(),))
+            raise RecipeCycleError(f"Recipe cycle detected: {path}")
+
+        recipe = self._recipe_for(item, root)
+        if recipe is None:
+            result = {"raw": {item: qty}, "crafts": [], "tools": [], "byproducts": {}, "time": 0}
+            self._cache[key] = result
+            return result
+
+        per_batch = next((o["quantity"] for o in recipe["outputs"] if o["item"].lower() == item.lower()), None)
+        batches = qty if per_batch is None else math.ceil(qty / per_batch)  # Output-less: run the recipe qty times
+        raw, crafts, tools, byproducts, total_time = {}, {}, [], {}, 0
+
+        for component, amount in recipe["components"].items():
+            sub = self._expand(component, amount * batches, stack + (item.lower(),))
+            for name, count in sub["raw"].items():
+                raw[name] = raw.get(name, 0) + count
+            for name, count in sub["crafts"]:
+                crafts[name] = crafts.get(name, 0) + count
+            for name, count in sub["byproducts"].items():
+                byproducts[name] = byproducts.get(name, 0) + count
+            tools.extend(tool for tool in sub["tools"] if tool not in tools)
+            total_time += sub["time"]
+
+        # This recipe runs after everything it depends on.
+        crafts[recipe["name"]] = crafts.get(recipe["name"], 0) + batches
+        tools.extend(tool for tool in recipe["requires"] if tool not in tools)
+        total_time += recipe.get("time", 30) * batches
+        for output in recipe["outputs"]:
+            produced = output["quantity"] * batches
+            if output["item"].lower() == item.lower():
+                produced -= qty  # Only recipes that actually yield the item reach here with a match
+            if produced > 0:
+                byproducts[output["item"]] = byproducts.get(output["item"], 0) + produced
+
+        result = {"raw": raw, "crafts": list(crafts.items()), "tools": tools, "byproducts": byproducts,
+                  "time": total_time}
+        self._cache[key] = result
+        return result
+
+    def craftable(self, inventory: dict, limit: int, resolved: dict = None) -> list:
+        """
+        Evaluate every recipe against one inventory snapshot and return [(recipe, max_batches)] for each recipe
+        the character could start right now, sorted by recipe name. Batches are capped at `limit`, which is also
+        the count for a recipe that takes no components.
+
+        Components and tools are matched with the same rules as !craft (first wildcard match), but each distinct
+        requirement is resolved only once across all recipes. Components that resolve to the same item are added
+        together before dividing, so a recipe never claims the same stack twice.
+
+        A caller evaluating the same inventory repeatedly can pass its own resolved dict to keep those matches
+        between calls; matches only depend on which items are held, so it must be cleared whenever an item is added
+        to or removed from the inventory.
+        """
+        items = item_index(inventory)
+        if resolved is None:
+            resolved = {}  # requirement -> matched inventory item, shared by every recipe in this pass
+
+        def resolve(requirement):
+            if requirement not in resolved:
+                resolved[requirement] = find_wildcard_match(inventory, requirement)
+            return resolved[requirement]
+
+        results = []
+        for recipe in self.catalog.all():
+            if not all(resolve(tool) in items for tool in recipe["requires"]):
+                continue
+            needed = {}
+            for component, amount in recipe["components"].items():
+                matched = resolve(component)
+                needed[matched] = needed.get(matched, 0) + amount
+            batches = min([items.get(matched, 0) // amount for matched, amount in needed.items() if amount > 0]
+                          + [limit])
+            if batches > 0:
+                results.append((recipe, batches))
+        results.sort(key=lambda entry: entry[0]["name"])
+        return results
+
+    @staticmethod
+    def missing(plan: dict, inventory: dict) -> dict:
+        """
+        Compare a plan's raw components and tools against an inventory and return what is short.
+
+        Requirements are resolved to inventory stacks with find_wildcard_match, as !craft does, and raw requirements
+        that land on the same stack are added together before comparing. Tools aren't consumed, so a tool only needs
+        its stack to hold at least one item.
+        """
+        needed = {}  # resolved item -> units the plan takes from it
+        for name, count in plan["raw"].items():
+            matched = find_wildcard_match(inventory, name)
+            needed[matched] = needed.get(matched, 0) + count
+        for tool in plan["tools"]:
+            matched = find_wildcard_match(inventory, tool)
+            needed[matched] = max(needed.get(matched, 0), 1)
+        short = {}
+        for matched, count in needed.items():
+            have = inventory["items"].get(matched, 0)
+            if have < count:
+                short[matched] = count - have
+        return short
+
+
+# Shared planner; its cache lives as long as the recipe file is unchanged.
+planner = RecipePlanner()
@@ -0,0 +1,86 @@
+import os
+import json
+from utils.functions import normalize_components
+
+RECIPES_FILE = "data/recipes.json"
+
+
+def parse_requires(tools_field) -> list:
+    """Turn a recipe's "requires" field (comma-separated string or list) into a list of tool names."""
+    if isinstance(tools_field, str):
+        return [tool.strip() for tool in tools_field.split(",") if tool.strip()]
+    if isinstance(tools_field, list):
+        return list(tools_field)
+    return []
+
+
+class RecipeCatalog:
+    """
+    Flat, pre-normalized view of data/recipes.json.
+
+    Recipes are indexed by item name and by output item (both case-insensitive). Components are normalized to a
+    dict and "requires" to a list when the file is loaded, so commands don't redo that work. The file is re-read
+    only when its modification time changes, so recipe edits go live without restarting the bot.
+    """
+
+    def __init__(self, recipes_file: str = RECIPES_FILE):
+        self.recipes_file = recipes_file
+        self.version = None  # mtime of the loaded file; changes whenever the catalog is rebuilt
+        self._by_name = {}  # lowercase item name -> recipe
+        self._by_output = {}  # lowercase output item -> [recipes that produce it]
+
+    def _build(self, raw: dict):
+        by_name, by_output = {}, {}
+        for category, items in raw.items():
+            for name, recipe in items.items():
+                entry = dict(recipe)
+                entry["name"] = name
+                entry["category"] = category
+                entry["components"] = normalize_components(recipe.get("components", {}))
+                entry["requires"] = parse_requires(recipe.get("requires", ""))
+                entry["outputs"] = recipe.get("outputs", [])
+                by_name.setdefault(name.lower(), entry)  # First category wins, as in the old category scan
+                for output in entry["outputs"]:
+                    by_output.setdefault(output["item"].lower(), []).append(entry)
+        # Prefer the recipe named after the item over ones that only yield it as a by-product.
+        for output, recipes in by_output.items():
+            recipes.sort(key=lambda r: r["name"].lower() != output)
+        self._by_name, self._by_output = by_name, by_output
+
+    def refresh(self):
+        """Reload the recipe file if it changed since the last load."""
+        try:
+            mtime = os.path.getmtime(self.recipes_file)
+        except OSError:
+            if self.version is not None:
+                self._by_name, self._by_output, self.version = {}, {}, None
+            return
+        if mtime == self.version:
+            return
+        try:
+            with open(self.recipes_file, "r") as f:
+                raw = json.load(f)
+        except Exception as e:
+            print(f"[DEBUG] RecipeCatalog: Error reading '{self.recipes_file}', keeping previous recipes: {e}")
+            return
+        self._build(raw)
+        self.version = mtime
+        print(f"[DEBUG] RecipeCatalog: Loaded {len(self._by_name)} recipes.")
+
+    def get(self, item_name: str):
+        """Return the recipe for an item, or None if it isn't craftable."""
+        self.refresh()
+        return self._by_name.get(item_name.strip().lower())
+
+    def producing(self, item_name: str) -> list:
+        """Return every recipe that yields the item as an output."""
+        self.refresh()
+        return self._by_output.get(item_name.strip().lower(), [])
+
+    def all(self) -> list:
+        self.refresh()
+        return list(self._by_name.values())
+
+
+# Shared catalog used by crafting, disassembling and the planners.
+catalog = RecipeCatalog()
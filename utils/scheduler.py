@@ -0,0 +1,148 @@
+import time
+import heapq
+import asyncio
+from utils.store import store
+
+HANDLER_RETRY_DELAY = 60  # Seconds before a job whose handler failed is tried again
+
+
+class JobScheduler:
+    """
+    Single timer that fires job completions (crafting, scavenge, disassembling, labor, ...) when they are due.
+
+    Deadlines are kept in a min-heap keyed by (job_type, key), where key is usually a character name.
+    The runner sleeps until the earliest deadline, then hands every due key to the handler registered for its
+    job type in one call, so handlers only read the characters that actually finished.
+    """
+
+    def __init__(self):
+        self._heap = []  # (deadline, sequence, job_type, key)
+        self._deadlines = {}  # (job_type, key) -> current deadline; heap entries that don't match are stale
+        self._handlers = {}  # job_type -> async handler(keys)
+        self._deadline_of = {}  # job_type -> function(character_data) -> epoch deadline or None
+        self._sequence = 0
+        self._wakeup = None
+        self._task = None
+
+    def register(self, job_type: str, handler, deadline_of=None):
+        """
+        Register the coroutine that completes jobs of a type.
+
+        handler is awaited with a list of keys that are due. deadline_of, if given, extracts the job's epoch
+        deadline from a character's data and is used to seed the heap once when the scheduler starts.
+        """
+        self._handlers[job_type] = handler
+        if deadline_of is not None:
+            self._deadline_of[job_type] = deadline_of
+
+    def schedule(self, job_type: str, key: str, deadline: float):
+        """Schedule (or reschedule) a job to fire at the given epoch time."""
+        self._deadlines[(job_type, key)] = deadline
+        self._sequence += 1
+        heapq.heappush(self._heap, (deadline, self._sequence, job_type, key))
+        if self._wakeup is not None and self._heap[0][1] == self._sequence:
+            self._wakeup.set()  # New earliest deadline: wake the runner so it doesn't oversleep
+
+    def cancel(self, job_type: str, key: str):
+        """Forget a scheduled job. Its heap entry is dropped lazily when it reaches the top."""
+        self._deadlines.pop((job_type, key), None)
+
+    def next_deadline(self):
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def _discard_stale(self):
+        while self._heap:
+            deadline, _, job_type, key = self._heap[0]
+            if self._deadlines.get((job_type, key)) == deadline:
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: float = None) -> dict:
+        """Remove and return every job that is due, grouped as {job_type: [keys]}."""
+        now = time.time() if now is None else now
+        due = {}
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, job_type, key = heapq.heappop(self._heap)
+            if self._deadlines.get((job_type, key)) == deadline:
+                del self._deadlines[(job_type, key)]
+                due.setdefault(job_type, []).append(key)
+            self._discard_stale()
+        return due
+
+    def seed(self, characters):
+        """Schedule every active job found in (name, data) pairs. Called once at startup."""
+        count = 0
+        for character_name, data in characters:
+            for job_type, deadline_of in self._deadline_of.items():
+                try:
+                    deadline = deadline_of(data)
+                except Exception as e:
+                    print(f"[DEBUG] JobScheduler: Could not read {job_type} deadline for {character_name}: {e}")
+                    continue
+                if deadline is not None:
+                    self.schedule(job_type, character_name, deadline)
+                    count += 1
+        print(f"[DEBUG] JobScheduler: Seeded {count} active job(s).")
+
+    async def fire_due(self, now: float = None):
+        """Run the handlers for every job that is due."""
+        await self._run_handlers(self.pop_due(now))
+
+    async def _run_handlers(self, due: dict):
+        for job_type, keys in due.items():
+            handler = self._handlers.get(job_type)
+            if handler is None:
+                print(f"[DEBUG] JobScheduler: No handler registered for '{job_type}'.")
+                continue
+            try:
+                await handler(keys)
+            except Exception as e:
+                print(f"[DEBUG] JobScheduler: Handler for '{job_type}' failed on {keys}: {e}")
+                if len(keys) > 1:
+                    # Run the batch again one key at a time so a single bad job can't hold back the others.
+                    # Handlers persist each key's completion before moving on (or nothing at all, for labor), and
+                    # re-read each character, so keys that already completed are no-ops.
+                    for key in keys:
+                        await self._run_handlers({job_type: [key]})
+                elif (job_type, keys[0]) not in self._deadlines:
+                    self.schedule(job_type, keys[0], time.time() + HANDLER_RETRY_DELAY)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            next_deadline = self.next_deadline()
+            timeout = None if next_deadline is None else max(0.0, next_deadline - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            await self.fire_due()
+
+    async def start(self):
+        """
+        Seed the heap from stored characters, then catch up before starting the runner task.
+
+        Deadlines are UTC epoch seconds, so they stay valid across restarts. Every job that came due while the bot
+        was down is completed here in one bulk pass (one handler call per job type); the rest wait in the heap.
+        """
+        if self._wakeup is not None:
+            return  # Already started (on_ready fires again after reconnects)
+        self._wakeup = asyncio.Event()
+        self.seed(store.characters())
+        overdue = self.pop_due()
+        await self._run_handlers(overdue)
+        print(f"[DEBUG] JobScheduler: Caught up on {sum(len(keys) for keys in overdue.values())} overdue job(s); "
+              f"{len(self._deadlines)} still pending.")
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._wakeup = None
+
+
+# Shared scheduler used by every cog with timed jobs.
+scheduler = JobScheduler()
@@ -0,0 +1,304 @@
+"""
+Headless economy simulator.
+
+Runs virtual characters through scavenge → craft → disassemble → contribute cycles on a simulated clock, using the
+bot's own rules: the compiled loot tables with ROLL_CHANCE and the roll counts, the recipe catalog with normalized
+components and wildcard matching, half-time disassembly, and the project phase definitions. Nothing touches Discord
+or the character store. Independent runs are spread over worker processes.
+
+Usage: python -m utils.simulator [--characters 1000] [--days 7] [--runs 8] [--workers N] [--project farmland]
+                                 [--seed 0] [--scavenge FILE] [--recipes FILE] [--projects FILE] [--top 15]
+
+Point --scavenge/--recipes/--projects at edited copies of the data files to compare against the live ones.
+"""
+import heapq
+import random
+import argparse
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from utils.json_io import load_json, SCAVENGE_FILE
+from utils.loot import LootTables, SCAVENGE_DURATION, make_rng
+from utils.recipes import RecipeCatalog, RECIPES_FILE
+from utils.planner import RecipePlanner
+from utils.item_index import ItemDict, item_index
+from utils.functions import find_wildcard_match, reserve_components, phase_is_complete, PROJECTS_FILE
+
+# How virtual characters choose their next job
+LABOR_CHANCE = 0.3  # Work on the project when its phase still needs labor
+CRAFT_CHANCE = 0.6  # Craft something when at least one recipe is affordable
+DISASSEMBLE_CHANCE = 0.05  # Break down a crafted batch
+TARGETED_CHANCE = 0.5  # Scavenge for a specific resource type instead of a general search
+LABOR_HOURS = 10  # Hours per labor job (MAX_HOURS_PER_WORK in the projects cog)
+
+
+class EconomySimulation:
+    """One simulated run: a shared project, a population of characters and an event queue of finishing jobs."""
+
+    def __init__(self, options: dict, seed=None):
+        self.rng = make_rng(seed)  # Loot rolls, exactly as the bot resolves them
+        self.choices = random.Random(seed)  # Character behaviour
+        self.loot = LootTables(options["scavenge"])
+        self.loot.refresh()
+        self.catalog = RecipeCatalog(options["recipes"])
+        self.planner = RecipePlanner(self.catalog)
+        self.recipes = {recipe["name"].lower(): recipe for recipe in self.catalog.all()}  # Fixed for the whole run
+        self.project_def = load_json(options["projects"]).get("project_types", {})[options["project"]]
+        self.horizon = options["days"] * 24 * 60  # Simulated minutes
+        self.inventories = [{"items": {}} for _ in range(options["characters"])]
+        for inventory in self.inventories:
+            item_index(inventory)
+        # Per-character caches for choosing crafts: the stack each recipe requirement resolved to, and the recipes
+        # affordable with them. Both are kept until one of those stacks changes.
+        self.resolved = [{} for _ in self.inventories]
+        self.affordable = [None] * len(self.inventories)
+        self.project = self._new_project()
+        self.events = []  # (finish minute, sequence, character index, job)
+        self.sequence = 0
+        self.stats = {"scavenges": 0, "crafts": 0, "disassemblies": 0, "labor_hours": 0, "contributed": 0,
+                      "phases_completed": 0, "projects_completed": 0, "phase_minutes": [], "supply": {},
+                      "crafted": {}}
+
+    def _new_project(self):
+        return {"phases": [{"required": dict(phase["required"]), "contributed": {k: 0 for k in phase["required"]}}
+                           for phase in self.project_def["phases"]],
+                "current_phase_index": 0, "phase_started": 0}
+
+    def _push(self, now, index, job, minutes):
+        self.sequence += 1
+        heapq.heappush(self.events, (now + minutes, self.sequence, index, job))
+
+    def _add(self, index, item, quantity, source=None):
+        items = self.inventories[index]["items"]
+        if item in items:
+            items[item] += quantity
+            self._changed(index, item)
+        else:
+            items[item] = quantity
+            # A new item lands last in insertion order, so it can only become the match of a wildcard that had none.
+            self._changed(index, item, lambda requirement, matched: (
+                "*" in requirement and matched not in items and ItemDict.fits(requirement, item)))
+        if source is not None:
+            source[item] = source.get(item, 0) + quantity
+
+    def _take(self, index, item, quantity):
+        items = self.inventories[index]["items"]
+        items[item] -= quantity
+        if items[item] > 0:
+            self._changed(index, item)
+        else:
+            del items[item]
+            self._changed(index, item, lambda requirement, matched: matched == item)
+
+    def _changed(self, index, item, rematch=None):
+        """
+        Note a change to one of a character's stacks. When an item was added or removed, rematch(requirement, match)
+        picks the cached matches that may now be wrong. The affordable recipes are dropped if a match or a matched
+        stack changed.
+        """
+        resolved = self.resolved[index]
+        stale = [requirement for requirement, matched in resolved.items() if rematch and rematch(requirement, matched)]
+        for requirement in stale:
+            del resolved[requirement]
+        if stale or item in resolved.values():
+            self.affordable[index] = None
+
+    def _affordable(self, index):
+        """Recipes the character can start one batch of, recomputed only after their items changed."""
+        if self.affordable[index] is None:
+            self.affordable[index] = self.planner.craftable(self.inventories[index], 1, self.resolved[index])
+        return self.affordable[index]
+
+    # --- project rules ---
+    def _phase(self):
+        return self.project["phases"][self.project["current_phase_index"]]
+
+    def _advance(self, now):
+        """
+        Move past every complete phase of the current project, each at most once. When the project completes it is
+        replaced, and the new one is checked on the next contribution, so phases that require nothing can't loop.
+        """
+        while phase_is_complete(self._phase()):
+            self.stats["phases_completed"] += 1
+            self.stats["phase_minutes"].append(now - self.project["phase_started"])
+            self.project["phase_started"] = now
+            if self.project["current_phase_index"] + 1 < len(self.project["phases"]):
+                self.project["current_phase_index"] += 1
+            else:
+                self.stats["projects_completed"] += 1
+                self.project = self._new_project()
+                self.project["phase_started"] = now
+                return
+
+    def _contribute(self, index, now):
+        inventory = self.inventories[index]
+        phase = self._phase()
+        for resource, amount in phase["required"].items():
+            remaining = amount - phase["contributed"].get(resource, 0)
+            if resource == "labor" or remaining <= 0:
+                continue
+            actual_item = find_wildcard_match(inventory, resource)
+            given = min(inventory["items"].get(actual_item, 0), remaining)
+            if given <= 0:
+                continue
+            self._take(index, actual_item, given)
+            phase["contributed"][resource] += given
+            self.stats["contributed"] += given
+        self._advance(now)
+
+    # --- character behaviour ---
+    def _start_next_job(self, index, now):
+        inventory = self.inventories[index]
+        phase = self._phase()
+        choices = self.choices
+
+        if phase["contributed"].get("labor", 0) < phase["required"].get("labor", 0) and choices.random() < LABOR_CHANCE:
+            self._push(now, index, ("labor", LABOR_HOURS), LABOR_HOURS * 60)
+            return
+
+        if choices.random() < CRAFT_CHANCE:
+            affordable = self._affordable(index)
+            if affordable:
+                recipe, _ = choices.choice(affordable)
+                if reserve_components(inventory, recipe) is None:
+                    self.affordable[index] = None
+                    self._push(now, index, ("craft", recipe), recipe.get("time", 30))
+                    return
+
+        if choices.random() < DISASSEMBLE_CHANCE:
+            candidates = [recipe for recipe in map(self.recipes.get, map(str.lower, inventory["items"]))
+                          if recipe is not None and recipe.get("disassemble", 1) != 0 and all(
+                              inventory["items"].get(o["item"], 0) >= o["quantity"] for o in recipe["outputs"])]
+            if candidates:
+                recipe = choices.choice(candidates)
+                for output in recipe["outputs"]:
+                    self._take(index, output["item"], output["quantity"])
+                self._push(now, index, ("disassemble", recipe), recipe.get("time", 1) / 2)
+                return
+
+        resource_type = None
+        if self.loot.groups and choices.random() < TARGETED_CHANCE:
+            resource_type = choices.choice(list(self.loot.groups))
+        self._push(now, index, ("scavenge", resource_type), SCAVENGE_DURATION.total_seconds() / 60)
+
+    def _finish(self, index, job, now):
+        kind, detail = job
+        if kind == "craft":
+            self.stats["crafts"] += 1
+            for output in detail["outputs"]:
+                self._add(index, output["item"], output["quantity"], self.stats["crafted"])
+        elif kind == "disassemble":
+            self.stats["disassemblies"] += 1
+            for component, quantity in detail["components"].items():
+                self._add(index, component, quantity)
+        elif kind == "labor":
+            phase = self._phase()
+            if "labor" in phase["required"]:
+                phase["contributed"]["labor"] = phase["contributed"].get("labor", 0) + detail
+                self.stats["labor_hours"] += detail
+
+    def run(self) -> dict:
+        for index in range(len(self.inventories)):
+            self._start_next_job(index, 0)
+
+        while self.events and self.events[0][0] <= self.horizon:
+            now = self.events[0][0]
+            finished = []
+            while self.events and self.events[0][0] == now:
+                _, _, index, job = heapq.heappop(self.events)
+                finished.append((index, job))
+
+            # Every scavenge finishing this minute is rolled in one batch, as the scavenge cog does.
+            scavenges = [(index, job[1]) for index, job in finished if job[0] == "scavenge"]
+            if scavenges:
+                loot = self.loot.resolve(scavenges, self.rng)
+                self.stats["scavenges"] += len(scavenges)
+                for index, found in loot.items():
+                    for item, count in found.items():
+                        self._add(index, item, count, self.stats["supply"])
+
+            for index, job in finished:
+                if job[0] != "scavenge":
+                    self._finish(index, job, now)
+                self._contribute(index, now)
+                self._start_next_job(index, now)
+
+        held = {}
+        for inventory in self.inventories:
+            for item, quantity in inventory["items"].items():
+                held[item] = held.get(item, 0) + quantity
+        self.stats["held"] = held
+        return self.stats
+
+
+def run_simulation(options: dict, run_index: int) -> dict:
+    """Run one simulation. Top-level so worker processes can pickle it."""
+    seed = None if options["seed"] is None else options["seed"] + run_index
+    return EconomySimulation(options, seed).run()
+
+
+def simulate(options: dict, runs: int, workers: int = None) -> list:
+    """Run independent simulations in parallel and return their stats in run order."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_simulation, [options] * runs, range(runs)))
+
+
+def _spread(values: list) -> str:
+    """Format mean, 10th and 90th percentile of per-run values."""
+    if len(values) < 2:
+        return f"{values[0]:,.1f}" if values else "0"
+    deciles = statistics.quantiles(values, n=10)
+    return f"{statistics.mean(values):,.1f} (p10 {deciles[0]:,.1f}, p90 {deciles[-1]:,.1f})"
+
+
+def report(results: list, options: dict, top: int = 15):
+    days = options["days"]
+    print(f"📊 {len(results)} run(s) × {options['characters']} characters × {days} days, "
+          f"project '{options['project']}'")
+    print("\n**Throughput per run** (mean, p10, p90)")
+    for key in ("scavenges", "crafts", "disassemblies", "labor_hours", "contributed", "phases_completed",
+                "projects_completed"):
+        values = [result[key] for result in results]
+        print(f"- {key}: {_spread(values)}  ({statistics.mean(values) / days:,.1f}/day)")
+    phase_minutes = [minutes for result in results for minutes in result["phase_minutes"]]
+    if phase_minutes:
+        print(f"- hours per phase: {_spread([minutes / 60 for minutes in phase_minutes])}")
+
+    for title, key in (("Scavenged supply", "supply"), ("Crafted supply", "crafted"), ("Held at the end", "held")):
+        totals = {}
+        for result in results:
+            for item in result[key]:
+                totals.setdefault(item, [])
+        for item, values in totals.items():
+            values.extend(result[key].get(item, 0) for result in results)
+        ranked = sorted(totals.items(), key=lambda entry: statistics.mean(entry[1]), reverse=True)
+        print(f"\n**{title}** (top {top} of {len(ranked)} items, per run)")
+        for item, values in ranked[:top]:
+            print(f"- {item}: {_spread(values)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the crafting economy offline.")
+    parser.add_argument("--characters", type=int, default=1000, help="Virtual characters per run.")
+    parser.add_argument("--days", type=float, default=7, help="Simulated days per run.")
+    parser.add_argument("--runs", type=int, default=8, help="Independent runs.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+    parser.add_argument("--project", default=None, help="Project type to work on (default: the first defined).")
+    parser.add_argument("--seed", type=int, default=None, help="Base seed; run i uses seed + i.")
+    parser.add_argument("--scavenge", default=SCAVENGE_FILE, help="Loot table file.")
+    parser.add_argument("--recipes", default=RECIPES_FILE, help="Recipe file.")
+    parser.add_argument("--projects", default=PROJECTS_FILE, help="Project definitions file.")
+    parser.add_argument("--top", type=int, default=15, help="Items to list per supply table.")
+    args = parser.parse_args()
+
+    project_types = load_json(args.projects).get("project_types", {})
+    project = args.project or next(iter(project_types), None)
+    if project not in project_types:
+        parser.error(f"unknown project type '{project}'; choose from {', '.join(project_types)}")
+
+    options = {"characters": args.characters, "days": args.days, "project": project, "seed": args.seed,
+               "scavenge": args.scavenge, "recipes": args.recipes, "projects": args.projects}
+    report(simulate(options, args.runs, args.workers), options, args.top)
+
+
+if __name__ == "__main__":
+    main()
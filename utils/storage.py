@@ -0,0 +1,488 @@
+import os
+import json
+import sqlite3
+
+CONFIG_FILE = "config.json"
+DATA_DIR = "data"
+TRADE_PROPOSALS_FILE = "trade_proposals.json"
+ACTIVE_PROJECTS_FILE = "active_projects.json"
+AVAILABILITY_FILE = "availability.json"
+OVERLAPS_FILE = "overlaps.json"
+DONATIONS_FILE = "donations.json"
+TRANSACTION_JOURNAL_FILE = "transaction_journal.json"
+DATABASE_FILE = "data/bot.db"
+
+CHARACTER_SECTIONS = ("items", "inventory", "stash")  # Item sections stored as rows in SQLite
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a character name the same way utils.inventory does (used as the storage key)."""
+    return name.strip().lower().capitalize()
+
+
+def _read_json(filepath, default):
+    if not os.path.exists(filepath):
+        return default
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+
+def _write_json(filepath, data, durable=False):
+    """
+    Write JSON through a temporary file so a crash never leaves a half-written file behind.
+
+    With durable=True the file and its directory entry are also fsynced before returning.
+    """
+    directory = os.path.dirname(filepath)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+    if durable and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class JsonBackend:
+    """
+    Stores everything in the original JSON files under data/. Every save rewrites the whole file.
+
+    Multi-file transactions go through a journal: the whole change set is written (and fsynced) to one file first,
+    which is the commit point, then applied to the data files. A journal left behind by a crash is replayed when
+    the backend is next opened.
+    """
+
+    name = "json"
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+        self.inventory_dir = os.path.join(data_dir, "inventories")
+        self._paths = None  # normalized character name -> file path
+        self._replay_journal()
+
+    def _file(self, filename):
+        return os.path.join(self.data_dir, filename)
+
+    # --- Characters ---
+    def _scan(self):
+        if self._paths is None:
+            self._paths = {}
+            if os.path.isdir(self.inventory_dir):
+                for filename in sorted(os.listdir(self.inventory_dir)):
+                    if filename.endswith(".json"):
+                        self._paths.setdefault(normalize_name(filename[:-5]), os.path.join(self.inventory_dir, filename))
+        return self._paths
+
+    def character_names(self) -> list:
+        return sorted(self._scan())
+
+    def load_character(self, name: str):
+        file_path = self._scan().get(name)
+        if file_path is None or not os.path.exists(file_path):
+            return None
+        with open(file_path, "r") as f:
+            return json.load(f)
+
+    def save_characters(self, characters: dict):
+        paths = self._scan()
+        for name, data in characters.items():
+            file_path = paths.setdefault(name, os.path.join(self.inventory_dir, f"{name}.json"))
+            _write_json(file_path, data)
+
+    def delete_character(self, name: str):
+        file_path = self._scan().pop(name, None)
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+
+    # --- Trades ---
+    def load_trades(self) -> list:
+        return _read_json(self._file(TRADE_PROPOSALS_FILE), [])
+
+    def save_trades(self, trades: list):
+        _write_json(self._file(TRADE_PROPOSALS_FILE), trades)
+
+    def upsert_trade(self, trade: dict):
+        trades = [t for t in self.load_trades() if t["id"] != trade["id"]]
+        trades.append(trade)
+        self.save_trades(trades)
+
+    def delete_trade(self, trade_id: str):
+        self.save_trades([t for t in self.load_trades() if t["id"] != trade_id])
+
+    # --- Transactions ---
+    def commit_transaction(self, characters: dict, deleted_trades=()):
+        """Save several characters and delete trades as one unit (see the class docstring)."""
+        journal = self._file(TRANSACTION_JOURNAL_FILE)
+        _write_json(journal, {"characters": characters, "deleted_trades": list(deleted_trades)}, durable=True)
+        self._apply_transaction(characters, deleted_trades)
+        os.remove(journal)
+
+    def _apply_transaction(self, characters: dict, deleted_trades):
+        self.save_characters(characters)
+        if deleted_trades:
+            deleted = set(deleted_trades)
+            self.save_trades([t for t in self.load_trades() if t["id"] not in deleted])
+
+    def _replay_journal(self):
+        journal = self._file(TRANSACTION_JOURNAL_FILE)
+        if not os.path.exists(journal):
+            return
+        pending = _read_json(journal, {})
+        self._apply_transaction(pending.get("characters", {}), pending.get("deleted_trades", []))
+        os.remove(journal)
+        print(f"[DEBUG] JsonBackend: Replayed an unfinished transaction for {len(pending.get('characters', {}))} "
+              f"character(s).")
+
+    # --- Projects ---
+    def load_projects(self) -> dict:
+        return _read_json(self._file(ACTIVE_PROJECTS_FILE), {})
+
+    def save_projects(self, projects: dict):
+        _write_json(self._file(ACTIVE_PROJECTS_FILE), projects)
+
+    def upsert_project(self, project: dict):
+        self.upsert_projects([project])
+
+    def upsert_projects(self, projects: list):
+        current = self.load_projects()
+        for project in projects:
+            current[str(project["id"])] = project
+        self.save_projects(current)
+
+    # --- Availability ---
+    def load_availability(self) -> list:
+        return _read_json(self._file(AVAILABILITY_FILE), {}).get("availability", [])
+
+    def save_availability(self, entries: list):
+        _write_json(self._file(AVAILABILITY_FILE), {"availability": entries})
+
+    def add_availability(self, entry: dict):
+        entries = self.load_availability()
+        entries.append(entry)
+        self.save_availability(entries)
+
+    def remove_availability(self, entry_id: str):
+        self.remove_availability_entries([entry_id])
+
+    def remove_availability_entries(self, entry_ids):
+        entry_ids = set(entry_ids)
+        self.save_availability([a for a in self.load_availability() if a["id"] not in entry_ids])
+
+    # --- Overlaps ---
+    def load_overlaps(self) -> list:
+        return _read_json(self._file(OVERLAPS_FILE), {}).get("overlaps", [])
+
+    def save_overlaps(self, overlaps: list):
+        _write_json(self._file(OVERLAPS_FILE), {"overlaps": overlaps})
+
+    # --- Donations ---
+    def load_donations(self) -> dict:
+        return _read_json(self._file(DONATIONS_FILE), {})
+
+    def save_donations(self, donations: dict):
+        _write_json(self._file(DONATIONS_FILE), donations)
+
+    def add_donation(self, character_name: str, item: str, amount: int, value: float):
+        donations = self.load_donations()
+        entry = donations.setdefault(character_name, {"items": {}, "total_value": 0})
+        entry["items"][item] = entry["items"].get(item, 0) + amount
+        entry["total_value"] += value
+        self.save_donations(donations)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS character_items (
+    character TEXT NOT NULL,
+    section TEXT NOT NULL,
+    item TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (character, section, item)
+);
+CREATE INDEX IF NOT EXISTS idx_character_items_item ON character_items (item);
+
+CREATE TABLE IF NOT EXISTS trades (
+    id TEXT PRIMARY KEY,
+    owner INTEGER,
+    character TEXT NOT NULL,
+    offer_item TEXT NOT NULL,
+    offer_amount INTEGER NOT NULL,
+    request_item TEXT NOT NULL,
+    request_amount INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_open ON trades (status, timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_character ON trades (character);
+CREATE INDEX IF NOT EXISTS idx_trades_offer_item ON trades (offer_item);
+CREATE INDEX IF NOT EXISTS idx_trades_request_item ON trades (request_item);
+
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    type TEXT,
+    name TEXT,
+    status TEXT NOT NULL,
+    current_phase_index INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status);
+CREATE TABLE IF NOT EXISTS project_phases (
+    project_id TEXT NOT NULL,
+    phase_index INTEGER NOT NULL,
+    phase TEXT NOT NULL,
+    required TEXT NOT NULL,
+    contributed TEXT NOT NULL,
+    PRIMARY KEY (project_id, phase_index)
+);
+
+CREATE TABLE IF NOT EXISTS availability (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_availability_window ON availability (start, end);
+CREATE INDEX IF NOT EXISTS idx_availability_user ON availability (user_id);
+
+CREATE TABLE IF NOT EXISTS overlaps (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS donations (
+    character TEXT NOT NULL,
+    item TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (character, item)
+);
+CREATE TABLE IF NOT EXISTS donation_totals (
+    character TEXT PRIMARY KEY,
+    total_value REAL NOT NULL
+);
+"""
+
+TRADE_COLUMNS = ("id", "owner", "character", "offer_item", "offer_amount", "request_item", "request_amount",
+                 "status", "timestamp")
+
+
+class SqliteBackend:
+    """Stores everything in a single SQLite database (WAL mode) with row-level updates."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str = DATABASE_FILE):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # --- Characters ---
+    def character_names(self) -> list:
+        return [row[0] for row in self.conn.execute("SELECT name FROM characters ORDER BY name")]
+
+    def load_character(self, name: str):
+        row = self.conn.execute("SELECT data FROM characters WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        for section in data.pop("_sections", []):
+            data[section] = {}
+        for section, item, quantity in self.conn.execute(
+                "SELECT section, item, quantity FROM character_items WHERE character = ? ORDER BY rowid", (name,)):
+            data.setdefault(section, {})[item] = quantity
+        return data
+
+    def _write_character(self, name: str, data: dict):
+        base = {k: v for k, v in data.items() if k not in CHARACTER_SECTIONS}
+        # Remember which sections exist (even if empty) so they round-trip unchanged.
+        base["_sections"] = [s for s in CHARACTER_SECTIONS if s in data]
+        self.conn.execute("INSERT OR REPLACE INTO characters (name, data) VALUES (?, ?)", (name, json.dumps(base)))
+        self.conn.execute("DELETE FROM character_items WHERE character = ?", (name,))
+        self.conn.executemany(
+            "INSERT INTO character_items (character, section, item, quantity) VALUES (?, ?, ?, ?)",
+            [(name, section, item, quantity)
+             for section in CHARACTER_SECTIONS
+             for item, quantity in (data.get(section) or {}).items()])
+
+    def save_characters(self, characters: dict):
+        with self.conn:
+            for name, data in characters.items():
+                self._write_character(name, data)
+
+    def delete_character(self, name: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM characters WHERE name = ?", (name,))
+            self.conn.execute("DELETE FROM character_items WHERE character = ?", (name,))
+
+    # --- Trades ---
+    def load_trades(self) -> list:
+        return [json.loads(row[0]) for row in self.conn.execute("SELECT data FROM trades ORDER BY timestamp")]
+
+    def _write_trade(self, trade: dict):
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO trades ({', '.join(TRADE_COLUMNS)}, data) VALUES ({', '.join('?' * 10)})",
+            tuple(trade.get(col) for col in TRADE_COLUMNS) + (json.dumps(trade),))
+
+    def save_trades(self, trades: list):
+        with self.conn:
+            self.conn.execute("DELETE FROM trades")
+            for trade in trades:
+                self._write_trade(trade)
+
+    def upsert_trade(self, trade: dict):
+        with self.conn:
+            self._write_trade(trade)
+
+    def delete_trade(self, trade_id: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM trades WHERE id = ?", (trade_id,))
+
+    # --- Transactions ---
+    def commit_transaction(self, characters: dict, deleted_trades=()):
+        """Save several characters and delete trades in a single SQLite transaction."""
+        with self.conn:
+            for name, data in characters.items():
+                self._write_character(name, data)
+            self.conn.executemany("DELETE FROM trades WHERE id = ?", [(trade_id,) for trade_id in deleted_trades])
+
+    # --- Projects ---
+    def load_projects(self) -> dict:
+        projects = {}
+        for project_id, data in self.conn.execute("SELECT id, data FROM projects ORDER BY CAST(id AS INTEGER)"):
+            projects[project_id] = json.loads(data)
+            projects[project_id]["phases"] = []
+        for project_id, phase, required, contributed in self.conn.execute(
+                "SELECT project_id, phase, required, contributed FROM project_phases ORDER BY project_id, phase_index"):
+            if project_id in projects:
+                projects[project_id]["phases"].append(
+                    {"phase": phase, "required": json.loads(required), "contributed": json.loads(contributed)})
+        return projects
+
+    def _write_project(self, project: dict):
+        project_id = str(project["id"])
+        base = {k: v for k, v in project.items() if k != "phases"}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO projects (id, type, name, status, current_phase_index, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (project_id, project.get("type"), project.get("name"), project.get("status", "active"),
+             project.get("current_phase_index", 0), json.dumps(base)))
+        self.conn.execute("DELETE FROM project_phases WHERE project_id = ?", (project_id,))
+        self.conn.executemany(
+            "INSERT INTO project_phases (project_id, phase_index, phase, required, contributed) VALUES (?, ?, ?, ?, ?)",
+            [(project_id, index, phase["phase"], json.dumps(phase.get("required", {})),
+              json.dumps(phase.get("contributed", {})))
+             for index, phase in enumerate(project.get("phases", []))])
+
+    def save_projects(self, projects: dict):
+        with self.conn:
+            for project in projects.values():
+                self._write_project(project)
+
+    def upsert_project(self, project: dict):
+        with self.conn:
+            self._write_project(project)
+
+    def upsert_projects(self, projects: list):
+        with self.conn:
+            for project in projects:
+                self._write_project(project)
+
+    # --- Availability ---
+    def load_availability(self) -> list:
+        return [json.loads(row[0]) for row in self.conn.execute("SELECT data FROM availability ORDER BY rowid")]
+
+    def _write_availability(self, entry: dict):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO availability (id, user_id, start, end, data) VALUES (?, ?, ?, ?, ?)",
+            (entry["id"], str(entry["user_id"]), str(entry["start"]), str(entry["end"]), json.dumps(entry)))
+
+    def save_availability(self, entries: list):
+        with self.conn:
+            self.conn.execute("DELETE FROM availability")
+            for entry in entries:
+                self._write_availability(entry)
+
+    def add_availability(self, entry: dict):
+        with self.conn:
+            self._write_availability(entry)
+
+    def remove_availability(self, entry_id: str):
+        self.remove_availability_entries([entry_id])
+
+    def remove_availability_entries(self, entry_ids):
+        with self.conn:
+            self.conn.executemany("DELETE FROM availability WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+
+    # --- Overlaps ---
+    def load_overlaps(self) -> list:
+        return [json.loads(row[0]) for row in self.conn.execute("SELECT data FROM overlaps ORDER BY rowid")]
+
+    def save_overlaps(self, overlaps: list):
+        with self.conn:
+            self.conn.execute("DELETE FROM overlaps")
+            self.conn.executemany("INSERT OR REPLACE INTO overlaps (key, data) VALUES (?, ?)",
+                                  [(o.get("key") or f"{o['start']}_{o['end']}", json.dumps(o)) for o in overlaps])
+
+    # --- Donations ---
+    def load_donations(self) -> dict:
+        donations = {}
+        for character, total_value in self.conn.execute("SELECT character, total_value FROM donation_totals"):
+            donations[character] = {"items": {}, "total_value": total_value}
+        for character, item, quantity in self.conn.execute("SELECT character, item, quantity FROM donations"):
+            donations.setdefault(character, {"items": {}, "total_value": 0})["items"][item] = quantity
+        return donations
+
+    def save_donations(self, donations: dict):
+        with self.conn:
+            self.conn.execute("DELETE FROM donations")
+            self.conn.execute("DELETE FROM donation_totals")
+            for character, entry in donations.items():
+                self.conn.execute("INSERT INTO donation_totals (character, total_value) VALUES (?, ?)",
+                                  (character, entry.get("total_value", 0)))
+                self.conn.executemany("INSERT INTO donations (character, item, quantity) VALUES (?, ?, ?)",
+                                      [(character, item, qty) for item, qty in entry.get("items", {}).items()])
+
+    def add_donation(self, character_name: str, item: str, amount: int, value: float):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO donations (character, item, quantity) VALUES (?, ?, ?) "
+                "ON CONFLICT (character, item) DO UPDATE SET quantity = quantity + excluded.quantity",
+                (character_name, item, amount))
+            self.conn.execute(
+                "INSERT INTO donation_totals (character, total_value) VALUES (?, ?) "
+                "ON CONFLICT (character) DO UPDATE SET total_value = total_value + excluded.total_value",
+                (character_name, value))
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the configured storage backend ("json" by default, or "sqlite" via config["STORAGE_BACKEND"])."""
+    global _backend
+    if _backend is None:
+        config = _read_json(CONFIG_FILE, {})
+        if config.get("STORAGE_BACKEND", "json").lower() == "sqlite":
+            _backend = SqliteBackend(config.get("DATABASE_FILE", DATABASE_FILE))
+        else:
+            _backend = JsonBackend()
+    return _backend
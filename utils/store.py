@@ -0,0 +1,124 @@
+from utils.storage import get_backend, normalize_name
+from utils.item_index import item_index
+
+FLUSH_INTERVAL_SECONDS = 30  # How often dirty characters are written back to storage
+
+
+class CharacterStore:
+    """
+    Shared in-memory cache of character data.
+
+    Characters are read from the storage backend the first time they are requested and kept in memory afterwards.
+    Changes are marked dirty and written back in batches by flush(), which runs on a timer and at shutdown.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._cache = {}  # normalized name -> character dict
+        self._names = None  # every known character name, cached after the first listing
+        self._dirty = set()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
+
+    def _known_names(self) -> set:
+        if self._names is None:
+            self._names = set(self.backend.character_names())
+        return self._names
+
+    def exists(self, character_name: str) -> bool:
+        key = normalize_name(character_name)
+        return key in self._cache or key in self._known_names()
+
+    def get(self, character_name: str):
+        """Return the cached character dict, loading it on first access. Returns None if missing."""
+        key = normalize_name(character_name)
+        if key in self._cache:
+            return self._cache[key]
+        if key not in self._known_names():
+            return None
+        try:
+            data = self.backend.load_character(key)
+        except Exception as e:
+            print(f"[DEBUG] CharacterStore: Error reading '{key}': {e}")
+            return None
+        if data is None:
+            return None
+        item_index(data)  # Keep wildcard lookups indexed while the character is in memory
+        self._cache[key] = data
+        return data
+
+    def put(self, character_name: str, data: dict):
+        """Store a character dict (new or replaced) and mark it for the next flush."""
+        key = normalize_name(character_name)
+        item_index(data)
+        self._cache[key] = data
+        self._known_names().add(key)
+        self._dirty.add(key)
+
+    def commit(self, characters: dict, deleted_trades=()):
+        """
+        Durably write several characters (and delete trades) as one backend transaction, bypassing the flush timer.
+
+        Cached dicts are updated in place afterwards, so references held elsewhere see the committed state.
+        """
+        batch = {normalize_name(name): data for name, data in characters.items()}
+        self.backend.commit_transaction(batch, deleted_trades)
+        for key, data in batch.items():
+            cached = self._cache.get(key)
+            if cached is None:
+                self._cache[key] = data
+            elif cached is not data:
+                cached.clear()
+                cached.update(data)
+            item_index(self._cache[key])
+            self._known_names().add(key)
+            self._dirty.discard(key)
+
+    def mark_dirty(self, character_name: str):
+        key = normalize_name(character_name)
+        if key in self._cache:
+            self._dirty.add(key)
+
+    def delete(self, character_name: str) -> bool:
+        """Remove a character from memory and storage immediately."""
+        key = normalize_name(character_name)
+        existed = key in self._known_names()
+        self._known_names().discard(key)
+        self._cache.pop(key, None)
+        self._dirty.discard(key)
+        if existed:
+            self.backend.delete_character(key)
+        return existed
+
+    def names(self) -> list:
+        """Return the normalized names of every known character."""
+        return sorted(self._known_names())
+
+    def characters(self):
+        """Yield (name, data) for every character, loading any that are not cached yet."""
+        for key in self.names():
+            data = self.get(key)
+            if data is not None:
+                yield key, data
+
+    def flush(self) -> int:
+        """Write every dirty character to storage in one batch. Returns the number of characters written."""
+        if not self._dirty:
+            return 0
+        batch = {key: self._cache[key] for key in self._dirty if key in self._cache}
+        try:
+            self.backend.save_characters(batch)
+        except Exception as e:
+            print(f"[DEBUG] CharacterStore: Error flushing {len(batch)} character(s): {e}")
+            return 0
+        self._dirty.clear()
+        print(f"[DEBUG] CharacterStore: Flushed {len(batch)} character(s) to {self.backend.name} storage.")
+        return len(batch)
+
+
+# Shared store used by every cog and background task.
+store = CharacterStore()
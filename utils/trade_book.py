@@ -0,0 +1,173 @@
+from bisect import bisect_left, bisect_right, insort
+from fractions import Fraction
+from datetime import datetime, timedelta, timezone
+from utils.storage import get_backend
+
+TRADE_LIFETIME = timedelta(weeks=1)  # Open proposals expire this long after they were made
+
+
+def trade_rate(trade: dict) -> Fraction:
+    """Units of the offered item a trade gives per unit of the requested item."""
+    return Fraction(trade["offer_amount"], trade["request_amount"])
+
+
+def trade_expiry(trade: dict) -> float:
+    """
+    Return the UTC epoch time at which an open trade expires.
+
+    New trades store it as "expires_at"; older ones are derived from their naive-UTC ISO "timestamp". A trade whose
+    timestamp is missing or can't be parsed returns 0.0 and expires at once, as the old hourly cleanup dropped such
+    trades on its next run.
+    """
+    if trade.get("expires_at") is not None:
+        return float(trade["expires_at"])
+    try:
+        created = datetime.fromisoformat(trade["timestamp"]).replace(tzinfo=timezone.utc)
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+    return (created + TRADE_LIFETIME).timestamp()
+
+
+class TradeBook:
+    """
+    In-memory book of open trade proposals.
+
+    Trades are held in a dict keyed by trade ID, with secondary indexes by offered item, requested item (both
+    case-insensitive) and proposing character, so accept, cancel and filtered listings never scan the whole book.
+    Each (offered item, requested item) pair also has a price-sorted book, best rate first, for the matching engine.
+    The book is read from the storage backend once and then kept in step with single-trade upserts and deletes.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._by_id = None  # trade id -> trade, in proposal order; None until loaded
+        self._by_offer = {}  # lowercase offered item -> {trade id: trade}
+        self._by_request = {}  # lowercase requested item -> {trade id: trade}
+        self._by_character = {}  # character -> {trade id: trade}
+        self._books = {}  # (lowercase offered item, lowercase requested item) -> sorted [(-rate, timestamp, id)]
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
+
+    def _load(self):
+        if self._by_id is not None:
+            return
+        self._by_id = {}
+        try:
+            trades = self.backend.load_trades()
+        except Exception as e:
+            print(f"[DEBUG] TradeBook: Error reading trade proposals: {e}")
+            trades = []
+        for trade in trades:
+            if trade.get("status") == "open":
+                self._index(trade)
+        print(f"[DEBUG] TradeBook: Loaded {len(self._by_id)} open trade(s).")
+
+    def _index(self, trade: dict):
+        trade_id = trade["id"]
+        self._by_id[trade_id] = trade
+        self._by_offer.setdefault(trade["offer_item"].lower(), {})[trade_id] = trade
+        self._by_request.setdefault(trade["request_item"].lower(), {})[trade_id] = trade
+        self._by_character.setdefault(trade["character"], {})[trade_id] = trade
+        insort(self._books.setdefault(self._pair(trade), []), self._book_entry(trade))
+
+    @staticmethod
+    def _pair(trade: dict) -> tuple:
+        return trade["offer_item"].lower(), trade["request_item"].lower()
+
+    @staticmethod
+    def _book_entry(trade: dict) -> tuple:
+        return -trade_rate(trade), trade.get("timestamp", ""), trade["id"]
+
+    def _unindex(self, trade: dict):
+        trade_id = trade["id"]
+        for index, key in ((self._by_offer, trade["offer_item"].lower()),
+                           (self._by_request, trade["request_item"].lower()),
+                           (self._by_character, trade["character"])):
+            bucket = index.get(key, {})
+            bucket.pop(trade_id, None)
+            if not bucket:
+                index.pop(key, None)
+        pair = self._pair(trade)
+        book = self._books.get(pair, [])
+        entry = self._book_entry(trade)
+        position = bisect_left(book, entry)
+        if position < len(book) and book[position] == entry:
+            del book[position]
+        if not book:
+            self._books.pop(pair, None)
+
+    def add(self, trade: dict):
+        """Add (or replace) an open trade and persist it."""
+        self._load()
+        previous = self._by_id.pop(trade["id"], None)
+        if previous is not None:
+            self._unindex(previous)
+        self._index(trade)
+        self.backend.upsert_trade(trade)
+
+    def get(self, trade_id: str):
+        """Return the open trade with this ID, or None."""
+        self._load()
+        return self._by_id.get(trade_id)
+
+    def remove(self, trade_id: str, persist: bool = True):
+        """
+        Remove a trade from the book and from storage. Returns the removed trade, or None if it wasn't open.
+
+        Pass persist=False when the deletion was already written as part of a transaction.
+        """
+        self._load()
+        trade = self._by_id.pop(trade_id, None)
+        if trade is None:
+            return None
+        self._unindex(trade)
+        if persist:
+            self.backend.delete_trade(trade_id)
+        return trade
+
+    def __len__(self):
+        self._load()
+        return len(self._by_id)
+
+    def open_trades(self) -> list:
+        """Every open trade, oldest first."""
+        self._load()
+        return list(self._by_id.values())
+
+    def offering(self, item: str) -> list:
+        self._load()
+        return list(self._by_offer.get(item.strip().lower(), {}).values())
+
+    def requesting(self, item: str) -> list:
+        self._load()
+        return list(self._by_request.get(item.strip().lower(), {}).values())
+
+    def by_character(self, character_name: str) -> list:
+        self._load()
+        return list(self._by_character.get(character_name, {}).values())
+
+    def involving(self, item: str) -> list:
+        """Open trades that offer or request the item, oldest first."""
+        self._load()
+        key = item.strip().lower()
+        trades = dict(self._by_offer.get(key, {}))
+        trades.update(self._by_request.get(key, {}))
+        return sorted(trades.values(), key=lambda trade: trade.get("timestamp", ""))
+
+    def best_offers(self, offer_item: str, request_item: str, min_rate: Fraction) -> list:
+        """
+        Open trades offering offer_item for request_item at min_rate or better (offered units per requested unit),
+        best rate first and oldest first within a rate. The cut-off is found by binary search on the pair's book.
+        """
+        self._load()
+        book = self._books.get((offer_item.strip().lower(), request_item.strip().lower()), [])
+        end = bisect_right(book, (-min_rate, chr(0x10FFFF)))
+        return [self._by_id[trade_id] for _, _, trade_id in book[:end]]
+
+
+# Shared trade book used by the trading cog.
+trade_book = TradeBook()
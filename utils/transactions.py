@@ -0,0 +1,75 @@
+import copy
+import asyncio
+from contextlib import asynccontextmanager
+from utils.storage import normalize_name
+from utils.store import store
+
+_locks = {}  # normalized character name -> asyncio.Lock
+
+
+def character_lock(character_name: str) -> asyncio.Lock:
+    """Return the lock guarding a character's data during transactions."""
+    key = normalize_name(character_name)
+    if key not in _locks:
+        _locks[key] = asyncio.Lock()
+    return _locks[key]
+
+
+class Transaction:
+    """
+    Working copies of the characters in a transaction, plus the trades it deletes.
+
+    Changes are made to the copies; nothing reaches the store until the transaction commits, and a rolled-back
+    (or failed) transaction leaves the cached characters untouched.
+    """
+
+    def __init__(self, keys: list):
+        self.characters = {}
+        for key in keys:
+            data = store.get(key)
+            self.characters[key] = copy.deepcopy(data) if data is not None else None
+        self.deleted_trades = []
+        self.rolled_back = False
+
+    def character(self, character_name: str):
+        """Return the working copy of a character in this transaction, or None if the character doesn't exist."""
+        return self.characters.get(normalize_name(character_name))
+
+    def delete_trade(self, trade_id: str):
+        self.deleted_trades.append(trade_id)
+
+    def rollback(self):
+        """Discard every change; the transaction will not commit."""
+        self.rolled_back = True
+
+    def commit(self):
+        store.commit({key: data for key, data in self.characters.items() if data is not None}, self.deleted_trades)
+
+
+@asynccontextmanager
+async def transaction(*character_names):
+    """
+    Lock the given characters and yield a Transaction over them.
+
+    Locks are taken in sorted name order so two transactions over overlapping characters can't deadlock. When the
+    block exits normally the changes are committed with one durable backend write; if it raises or calls
+    rollback(), nothing is written.
+
+        async with transaction("Taco", "Burrito") as tx:
+            tx.character("Taco")["total_gold"] -= 5
+            tx.character("Burrito")["total_gold"] += 5
+    """
+    keys = sorted({normalize_name(name) for name in character_names})
+    acquired = []
+    try:
+        for key in keys:
+            lock = character_lock(key)
+            await lock.acquire()
+            acquired.append(lock)
+        tx = Transaction(keys)
+        yield tx
+        if not tx.rolled_back:
+            tx.commit()
+    finally:
+        for lock in reversed(acquired):
+            lock.release()